@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Comment, Genre, Review, User, Title
+from .models import Category, Comment, Genre, OutboxEmail, Review, User, Title
 
 
 class CategoriesAdmin(admin.ModelAdmin):
@@ -16,6 +16,10 @@ class GenresAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug',)
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipients', 'subject', 'created', 'attempts', 'sent',)
+
+
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'text', 'score', 'pub_date',)
 
@@ -29,5 +33,6 @@ admin.site.register(User, UserAdmin)
 admin.site.register(Category, CategoriesAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Genre, GenresAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Title, TitlesAdmin)
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.db import close_old_connections
+
+# Stream chunks buffered ahead of a slow client.
+STREAM_BUFFER = 16
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    """ASGI handler running the synchronous view stack on a bounded pool.
+
+    Request bodies and responses are exchanged on the event loop, so slow
+    clients only cost a coroutine; a pool thread is taken just while
+    middleware and views run. Requests beyond ``ASGI_THREADS`` wait on the
+    loop instead of spawning threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.ASGI_THREADS,
+            thread_name_prefix='asgi-view')
+
+    async def get_response(self, request):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, self.get_response_in_thread, request)
+
+    def get_response_in_thread(self, request):
+        # request_started/finished fire on the loop thread, so the pool
+        # threads recycle their own connections.
+        close_old_connections()
+        try:
+            return BaseHandler.get_response(self, request)
+        finally:
+            close_old_connections()
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # Streamed rows come from a database cursor, which has to be read
+        # on one pool thread; chunks reach the client through a queue.
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(STREAM_BUFFER)
+        done = object()
+        stopped = threading.Event()
+
+        def produce():
+            close_old_connections()
+            try:
+                for part in response:
+                    if stopped.is_set():
+                        break
+                    asyncio.run_coroutine_threadsafe(
+                        queue.put(part), loop).result()
+            finally:
+                response.close()
+                close_old_connections()
+                asyncio.run_coroutine_threadsafe(
+                    queue.put(done), loop).result()
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_response_headers(response),
+        })
+        producer = loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                part = await queue.get()
+                if part is done:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+        except BaseException:
+            # The client went away, unblock the producer and free its thread.
+            stopped.set()
+            while not producer.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0)
+            raise
+        await producer
+        await send({'type': 'http.response.body'})
+
+    def get_response_headers(self, response):
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()]
+        headers += [
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()]
+        return headers
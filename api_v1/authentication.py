@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Listed in model field order, as Model.from_db() expects.
+USER_CACHE_FIELDS = ('id', 'username', 'is_active', 'role',)
+
+
+def get_user_cache():
+    return caches[settings.JWT_USER_CACHE]
+
+
+def get_user_cache_key(user_id):
+    return f'jwt-user:{user_id}'
+
+
+def invalidate_user_cache(user_id):
+    get_user_cache().delete(get_user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that keeps the fields permissions need in cache.
+
+    The returned user has every other column deferred, so reading one of
+    them still falls back to the database. Entries live in the
+    ``JWT_USER_CACHE`` alias, expire after ``JWT_USER_CACHE_TIMEOUT``
+    seconds and are dropped when a user changes.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        cache = get_user_cache()
+        key = get_user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            values = [getattr(user, field) for field in USER_CACHE_FIELDS]
+            cache.set(key, values, settings.JWT_USER_CACHE_TIMEOUT)
+            return user
+        user = User.from_db(User.objects.db, USER_CACHE_FIELDS, values)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+        return user
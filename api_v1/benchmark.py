@@ -0,0 +1,546 @@
+import asyncio
+import http.client
+import json
+import logging
+import platform
+import random
+import statistics
+import threading
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import quote, urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .asgi import ThreadPoolASGIHandler
+from .models import Category, Comment, Genre, Review, Title, User
+from .rankings import rebuild_rankings
+from .search import get_search_index
+from .sqlite import get_pragmas
+from .suggest import build_suggest_indexes
+
+# SQLite as Django opens it: rollback journal, full fsync on commit.
+DEFAULT_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+WORDS = ('звезда', 'ночь', 'город', 'море', 'тень', 'огонь', 'сад', 'путь',
+         'зима', 'песня', 'дом', 'ветер', 'остров', 'сон', 'река', 'лес')
+
+DEFAULT_SCALE = {
+    'users': 50,
+    'genres': 20,
+    'categories': 5,
+    'titles': 200,
+    'reviews': 5,
+    'comments': 2,
+}
+
+
+def seed(scale, seed_value=0):
+    """Fill an empty database with a deterministic synthetic catalogue.
+
+    ``reviews`` and ``comments`` are counted per title and per review.
+    Returns the ids and slugs the routes are built from.
+    """
+    rng = random.Random(seed_value)
+    password = make_password(None)
+    User.objects.bulk_create(
+        [User(username=f'bench{number}', email=f'bench{number}@yamdb.fake',
+              password=password) for number in range(scale['users'])] +
+        [User(username='bench-admin', email='bench-admin@yamdb.fake',
+              password=password, role='admin')])
+    Category.objects.bulk_create(
+        Category(name=f'Категория {number}', slug=f'category-{number}')
+        for number in range(scale['categories']))
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(scale['genres']))
+    # Not every backend returns primary keys from a bulk insert.
+    users = list(User.objects.exclude(
+        username='bench-admin').values_list('pk', flat=True))
+    categories = list(Category.objects.values_list('pk', flat=True))
+    genres = list(Genre.objects.values_list('pk', flat=True))
+    Title.objects.bulk_create(
+        Title(name=f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} '
+                   f'{number}',
+              year=rng.randint(1950, 2020),
+              description=' '.join(rng.choices(WORDS, k=12)),
+              category_id=rng.choice(categories))
+        for number in range(scale['titles']))
+    titles = list(Title.objects.order_by('pk').values_list('pk', flat=True))
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genre_id)
+        for title_id in titles
+        for genre_id in rng.sample(genres, min(len(genres), 3)))
+    Review.objects.bulk_create(
+        Review(title_id=title_id, author_id=author_id,
+               score=rng.randint(1, 10),
+               text=' '.join(rng.choices(WORDS, k=30)))
+        for title_id in titles
+        for author_id in rng.sample(users, min(len(users), scale['reviews'])))
+    reviews = list(Review.objects.order_by('pk').values_list(
+        'pk', 'title_id'))
+    Comment.objects.bulk_create(
+        Comment(review_id=review_id, author_id=rng.choice(users),
+                text=' '.join(rng.choices(WORDS, k=10)))
+        for review_id, _ in reviews
+        for _ in range(scale['comments']))
+    Title.objects.rebuild_ratings()
+    get_search_index().rebuild()
+    build_suggest_indexes()
+    rebuild_rankings()
+    comment = Comment.objects.order_by('pk').values_list(
+        'pk', 'review_id', 'review__title_id').first()
+    return {
+        'title': titles[0],
+        'review': reviews[0],
+        'comment': comment,
+        'user': User.objects.get(username='bench0'),
+        'admin': User.objects.get(username='bench-admin'),
+        'genre': Genre.objects.order_by('pk').first().slug,
+        'category': Category.objects.order_by('pk').first().slug,
+    }
+
+
+def get_scenarios(data):
+    """Every GET route of the API with the role it is requested as."""
+    title_id = data['title']
+    review_id, review_title_id = data['review']
+    comment_id, comment_review_id, comment_title_id = data['comment']
+    reviews = f'/api/v1/titles/{review_title_id}/reviews/'
+    comments = (f'/api/v1/titles/{comment_title_id}/reviews/'
+                f'{comment_review_id}/comments/')
+    return {
+        'api-root': ('anonymous', '/api/v1/'),
+        'users-list': ('admin', '/api/v1/users/'),
+        'users-detail': ('admin', f'/api/v1/users/{data["user"].username}/'),
+        'users-me': ('user', '/api/v1/users/me/'),
+        'titles-list': ('anonymous', '/api/v1/titles/'),
+        'titles-list-genre': (
+            'anonymous', f'/api/v1/titles/?genre={data["genre"]}'),
+        'titles-list-category': (
+            'anonymous', f'/api/v1/titles/?category={data["category"]}'),
+        'titles-list-rating': (
+            'anonymous', '/api/v1/titles/?ordering=-rating'),
+        'titles-list-search': ('anonymous', '/api/v1/titles/?search=звезда'),
+        'titles-detail': ('anonymous', f'/api/v1/titles/{title_id}/'),
+        'reviews-list': ('anonymous', reviews),
+        'reviews-list-cursor': ('anonymous', f'{reviews}?pagination=cursor'),
+        'reviews-detail': ('anonymous', f'{reviews}{review_id}/'),
+        'comments-list': ('anonymous', comments),
+        'comments-detail': ('anonymous', f'{comments}{comment_id}/'),
+        'categories-list': ('anonymous', '/api/v1/categories/'),
+        'genres-list': ('anonymous', '/api/v1/genres/'),
+        'export': ('admin', '/api/v1/export/reviews/'),
+        'suggest': ('anonymous', '/api/v1/suggest/?q=зв'),
+        'rankings': ('anonymous', '/api/v1/rankings/'),
+        'rankings-trending': ('anonymous', '/api/v1/rankings/trending/'),
+        'rankings-genre': (
+            'anonymous', f'/api/v1/rankings/genres/{data["genre"]}/'),
+        'rankings-category': (
+            'anonymous', f'/api/v1/rankings/categories/{data["category"]}/'),
+        'metrics': ('admin', '/api/v1/metrics/'),
+        'metrics-prometheus': ('admin', '/api/v1/metrics/prometheus/'),
+    }
+
+
+def iter_routes(patterns, prefix=''):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route, pattern.callback
+
+
+def serves_get(callback):
+    if hasattr(callback, 'actions'):
+        return 'get' in callback.actions
+    return hasattr(getattr(callback, 'view_class', None), 'get')
+
+
+def uncovered_routes(scenarios):
+    """API routes answering GET which no scenario requests."""
+    covered = {resolve(path.split('?')[0]).func
+               for _, path in scenarios.values()}
+    return sorted(
+        route for route, callback in iter_routes(get_resolver().url_patterns)
+        if route.startswith('api/') and serves_get(callback) and
+        callback not in covered)
+
+
+def get_headers(role, data):
+    if role == 'anonymous':
+        return {}
+    return {'HTTP_AUTHORIZATION':
+            f'Bearer {AccessToken.for_user(data[role])}'}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[position]
+
+
+def summarize(latencies):
+    return {
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'mean': statistics.mean(latencies),
+    }
+
+
+def run_client(scenarios, data, iterations):
+    """Request each scenario sequentially with the Django test client."""
+    client = Client()
+    results = {}
+    for name, (role, path) in sorted(scenarios.items()):
+        headers = get_headers(role, data)
+        latencies, queries = [], []
+        caches['default'].clear()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(path, **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f'{name}: GET {path} answered {response.status_code}')
+            queries.append(len(context.captured_queries))
+        results[name] = dict(summarize(latencies), requests=iterations,
+                             queries=max(queries))
+    return results
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def run_load(scenarios, data, threads, requests_per_thread):
+    """Replay all scenarios from several threads against a WSGI server."""
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    server_thread = threading.Thread(target=server.serve_forever,
+                                     daemon=True)
+    server_thread.start()
+    requests = [(quote(path, safe='/?=&'),
+                 {key[5:].replace('_', '-'): value
+                  for key, value in get_headers(role, data).items()})
+                for role, path in scenarios.values()]
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(number):
+        rng = random.Random(number)
+        client = http.client.HTTPConnection('127.0.0.1', server.server_port)
+        own, failed = [], []
+        for _ in range(requests_per_thread):
+            path, headers = rng.choice(requests)
+            start = time.perf_counter()
+            client.request('GET', path, headers=headers)
+            response = client.getresponse()
+            response.read()
+            own.append(time.perf_counter() - start)
+            if response.status != 200:
+                failed.append(f'GET {path} answered {response.status}')
+        client.close()
+        with lock:
+            latencies.extend(own)
+            errors.extend(failed)
+
+    workers = [threading.Thread(target=worker, args=(number,))
+               for number in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    if errors or len(latencies) < threads * requests_per_thread:
+        raise RuntimeError('; '.join(sorted(set(errors))) or
+                           'Load generator threads failed')
+    return dict(summarize(latencies), requests=len(latencies),
+                threads=threads, throughput=len(latencies) / elapsed)
+
+
+def get_requests(scenarios, data):
+    requests = []
+    for role, path in scenarios.values():
+        url = urlsplit(quote(path, safe='/?=&'))
+        requests.append((url.path, url.query, get_headers(role, data)))
+    return requests
+
+
+def run_wsgi(requests, clients, requests_per_client):
+    """Call the WSGI application from one thread per client."""
+    application = get_wsgi_application()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client(number):
+        rng = random.Random(number)
+        own, failed = [], []
+        for _ in range(requests_per_client):
+            path, query, headers = rng.choice(requests)
+            environ = {'PATH_INFO': path, 'QUERY_STRING': query, **headers}
+            setup_testing_defaults(environ)
+            statuses = []
+            start = time.perf_counter()
+            body = application(
+                environ, lambda status, _: statuses.append(status))
+            b''.join(body)
+            body.close()
+            own.append(time.perf_counter() - start)
+            if not statuses[0].startswith('200'):
+                failed.append(f'GET {path} answered {statuses[0]}')
+        with lock:
+            latencies.extend(own)
+            errors.extend(failed)
+
+    workers = [threading.Thread(target=client, args=(number,))
+               for number in range(clients)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed, clients
+
+
+async def asgi_request(application, path, query='', headers=None):
+    """Send one GET through an ASGI application, return status and body."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': query.encode(),
+        'headers': [(key[5:].replace('_', '-').lower().encode(),
+                     value.encode())
+                    for key, value in (headers or {}).items()],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:])
+
+
+def run_asgi(requests, clients, requests_per_client):
+    """Drive the ASGI application with one coroutine per client."""
+    application = ThreadPoolASGIHandler()
+    latencies, errors = [], []
+
+    async def client(number):
+        rng = random.Random(number)
+        for _ in range(requests_per_client):
+            path, query, headers = rng.choice(requests)
+            start = time.perf_counter()
+            status, _ = await asgi_request(
+                application, path, query, headers)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(f'GET {path} answered {status}')
+
+    async def main():
+        await asyncio.gather(*(client(number) for number in range(clients)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    application.executor.shutdown()
+    return latencies, errors, elapsed, settings.ASGI_THREADS
+
+
+def run_interfaces(scenarios, data, clients, requests_per_client):
+    """Serve the same request mix through WSGI and ASGI in process.
+
+    WSGI needs a thread per concurrent client, ASGI keeps clients as
+    coroutines and runs views on ``ASGI_THREADS`` pool threads.
+    """
+    requests = get_requests(scenarios, data)
+    results = {}
+    for name, runner in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+        latencies, errors, elapsed, threads = runner(
+            requests, clients, requests_per_client)
+        if errors:
+            raise RuntimeError(f'{name}: ' + '; '.join(sorted(set(errors))))
+        results[name] = dict(summarize(latencies), requests=len(latencies),
+                             clients=clients, threads=threads,
+                             throughput=len(latencies) / elapsed)
+    return results
+
+
+def run_contention(data, readers, writers, seconds):
+    """Read comments of a review while other threads comment on it.
+
+    Every request opens its own connection, as with ``CONN_MAX_AGE = 0``,
+    so each profile's pragmas are applied per request. Requests failing
+    with ``database is locked`` count as errors.
+    """
+    comment_id, review_id, title_id = data['comment']
+    path = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    headers = get_headers('user', data)
+    counts, latencies = {}, {'read': [], 'write': []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(kind):
+        client = Client()
+        own, ok, failed = [], 0, 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if kind == 'read':
+                    response = client.get(path)
+                else:
+                    response = client.post(path, {'text': 'Ещё комментарий'},
+                                           **headers)
+                success = response.status_code in (200, 201)
+            except Exception:
+                success = False
+            own.append(time.perf_counter() - start)
+            ok += success
+            failed += not success
+        with lock:
+            latencies[kind].extend(own)
+            counts[kind] = counts.get(kind, 0) + ok
+            counts['errors'] = counts.get('errors', 0) + failed
+
+    workers = [threading.Thread(target=worker, args=('read',))
+               for _ in range(readers)]
+    workers += [threading.Thread(target=worker, args=('write',))
+                for _ in range(writers)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    result = {'readers': readers, 'writers': writers,
+              'errors': counts.get('errors', 0)}
+    for kind in ('read', 'write'):
+        result[f'{kind}s_per_second'] = counts.get(kind, 0) / elapsed
+        if latencies[kind]:
+            result[f'{kind}_p95'] = percentile(latencies[kind], 0.95)
+    return result
+
+
+def run_sqlite_profiles(data, readers, writers, seconds):
+    """Compare the contention workload under default and tuned pragmas."""
+    results = {}
+    request_logger = logging.getLogger('django.request')
+    disabled = request_logger.disabled
+    # Locked database errors would flood the log with tracebacks.
+    request_logger.disabled = True
+    last_comment = Comment.objects.order_by('-pk').values_list(
+        'pk', flat=True).first()
+    try:
+        for name, pragmas in (('default', DEFAULT_PRAGMAS),
+                              ('tuned', settings.SQLITE_PRAGMAS)):
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                # Reconnect alone, a journal mode switch needs the file
+                # to itself.
+                connection.close()
+                connection.ensure_connection()
+                results[name] = run_contention(
+                    data, readers, writers, seconds)
+                results[name]['pragmas'] = dict(get_pragmas())
+                # Both profiles start from the same comment list.
+                Comment.objects.filter(pk__gt=last_comment).delete()
+    finally:
+        request_logger.disabled = disabled
+        connection.close()
+    return results
+
+
+def run(scale, seed_value=0, iterations=20, threads=4,
+        requests_per_thread=100, interface_clients=0,
+        contention_seconds=0, readers=4, writers=2):
+    data = seed(scale, seed_value)
+    scenarios = get_scenarios(data)
+    missing = uncovered_routes(scenarios)
+    if missing:
+        raise RuntimeError(f'Routes without a scenario: {", ".join(missing)}')
+    result = {
+        'meta': {
+            'scale': scale,
+            'seed': seed_value,
+            'iterations': iterations,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'client': run_client(scenarios, data, iterations),
+    }
+    if threads:
+        result['load'] = run_load(
+            scenarios, data, threads, requests_per_thread)
+    if interface_clients:
+        result['interfaces'] = run_interfaces(
+            scenarios, data, interface_clients, requests_per_thread)
+    if contention_seconds and connection.vendor == 'sqlite':
+        result['sqlite'] = run_sqlite_profiles(
+            data, readers, writers, contention_seconds)
+    return result
+
+
+def compare(baseline, current, max_regression):
+    """List regressions of ``current`` against a ``baseline`` run.
+
+    Query counts are deterministic and must not grow at all, latency
+    percentiles may grow by ``max_regression`` (0.2 is 20%) to absorb noise.
+    """
+    if baseline['meta']['scale'] != current['meta']['scale']:
+        return ['Runs used different scales and cannot be compared']
+    problems = []
+    for name, before in sorted(baseline['client'].items()):
+        after = current['client'].get(name)
+        if after is None:
+            continue
+        if after['queries'] > before['queries']:
+            problems.append(f'{name}: {before["queries"]} -> '
+                            f'{after["queries"]} queries')
+        for key in ('p50', 'p95'):
+            if after[key] > before[key] * (1 + max_regression):
+                problems.append(f'{name}: {key} {before[key]:.4f}s -> '
+                                f'{after[key]:.4f}s')
+    if 'load' in baseline and 'load' in current:
+        before, after = baseline['load'], current['load']
+        if after['throughput'] < before['throughput'] / (1 + max_regression):
+            problems.append(f'load: throughput {before["throughput"]:.1f} -> '
+                            f'{after["throughput"]:.1f} requests/s')
+    return problems
+
+
+def dumps(result):
+    return json.dumps(result, indent=2, ensure_ascii=False, sort_keys=True)
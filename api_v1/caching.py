@@ -0,0 +1,125 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import get_not_modified
+from .routing import use_primary
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified',)
+
+
+def get_cache():
+    return caches[settings.API_CACHE]
+
+
+def get_version(namespace):
+    return get_cache().get_or_set(f'api-version:{namespace}', 1, None)
+
+
+def increment(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def bump_version(namespace):
+    """Drop every cached response of a namespace at once."""
+    increment(get_cache(), f'api-version:{namespace}')
+
+
+def object_key(namespace, object_id):
+    return f'api-object:{namespace}:{object_id}'
+
+
+def evictions_key(namespace):
+    return f'api-evictions:{namespace}'
+
+
+def evict_object(namespace, object_id):
+    """Drop the cached responses which rendered the given object."""
+    cache = get_cache()
+    # Counted before the object moves: a response whose versions show the
+    # eviction then also sees the count change and is not stored.
+    increment(cache, evictions_key(namespace))
+    increment(cache, object_key(namespace, object_id))
+
+
+def on_commit(func, *args):
+    # Evicting before commit would let a concurrent reader cache old rows.
+    transaction.on_commit(lambda: func(*args))
+
+
+class CachedListMixin:
+    """Cache anonymous list responses of a viewset.
+
+    Keys combine the namespace version, path and sorted query string.
+    Each entry also records the versions of the objects it renders and is
+    ignored once one of them moves, so a change of one object skips only
+    the pages showing it, while ``bump_version`` discards the whole
+    namespace. A response rendered while an object of the namespace was
+    evicted may show it stale, so it is not stored.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().list, request, *args, **kwargs)
+
+    def get_cache_namespaces(self, request):
+        return (self.cache_namespace,)
+
+    def get_cache_key(self, request):
+        versions = ':'.join(
+            f'{namespace}.{get_version(namespace)}'
+            for namespace in self.get_cache_namespaces(request))
+        query = urlencode(sorted(
+            (key, value) for key, values in request.query_params.lists()
+            for value in values))
+        return f'api:{versions}:{request.path}?{query}'
+
+    def get_object_versions(self, cache, keys):
+        # An object never evicted, or whose version was culled, reads as 1;
+        # evict_object starts counting at 2, so both cases stay apart.
+        current = cache.get_many(keys)
+        return {key: current.get(key, 1) for key in keys}
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.user and request.user.is_authenticated:
+            return handler(*args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, headers, versions = entry
+            if self.get_object_versions(cache, list(versions)) == versions:
+                return (get_not_modified(request._request, headers) or
+                        Response(data, headers=headers))
+        evictions = cache.get(evictions_key(self.cache_namespace))
+        # A lagging replica would get cached under the fresh version.
+        with use_primary():
+            response = handler(*args, **kwargs)
+        if response.status_code != 200:
+            return response
+        headers = {header: response[header] for header in VALIDATOR_HEADERS
+                   if response.has_header(header)}
+        items = response.data.get('results', [response.data])
+        versions = self.get_object_versions(cache, [
+            object_key(self.cache_namespace, item['id'])
+            for item in items if 'id' in item])
+        if cache.get(evictions_key(self.cache_namespace)) != evictions:
+            return response
+        cache.set(key, (response.data, headers, versions),
+                  settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class CachedReadMixin(CachedListMixin):
+    """Cache anonymous list and retrieve responses of a viewset."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, request, *args, **kwargs)
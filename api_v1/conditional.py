@@ -0,0 +1,79 @@
+import hashlib
+from calendar import timegm
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+
+def build_validators(request, fingerprint, last_modified=None):
+    """Return ETag/Last-Modified headers for a resource fingerprint."""
+    headers = {}
+    if fingerprint is not None:
+        digest = hashlib.md5(
+            f'{request.get_full_path()}:{fingerprint}'.encode()).hexdigest()
+        headers['ETag'] = quote_etag(digest)
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(
+            timegm(last_modified.utctimetuple()))
+    return headers
+
+
+def get_not_modified(request, headers):
+    """Return a 304 response when the client copy matches the headers."""
+    if not headers:
+        return None
+    probe = HttpResponse()
+    for header, value in headers.items():
+        probe[header] = value
+    response = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+        response=probe
+    )
+    if response.status_code == 304:
+        return response
+    return None
+
+
+class ConditionalListMixin:
+    """Answer list requests with 304 when the client copy is current.
+
+    Viewsets return ``(fingerprint, last_modified)`` from
+    ``get_list_validators``; both are derived from cheap aggregates so the
+    check runs without serializing the payload. ``last_modified`` must move
+    on deletes too, collections whose newest row stays put return None.
+    """
+
+    def get_list_validators(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.get_list_validators, super().list,
+            request, *args, **kwargs)
+
+    def conditional_response(self, request, validators, handler,
+                             *args, **kwargs):
+        headers = build_validators(request, *validators())
+        not_modified = get_not_modified(request._request, headers)
+        if not_modified is not None:
+            return not_modified
+        response = handler(*args, **kwargs)
+        if response.status_code == 200:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+
+class ConditionalReadMixin(ConditionalListMixin):
+    """Answer list and retrieve requests with 304 when possible."""
+
+    def get_object_validators(self):
+        raise NotImplementedError
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.get_object_validators, super().retrieve,
+            request, *args, **kwargs)
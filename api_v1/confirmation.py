@@ -0,0 +1,49 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import ConfirmationCode
+
+CODE_LENGTH = 12
+
+
+def get_code_digest(code):
+    return hmac.new(settings.SECRET_KEY.encode(), code.encode(),
+                    hashlib.sha256).hexdigest()
+
+
+def issue_code(user):
+    """Create a single-use confirmation code for user and return it.
+
+    Only a keyed HMAC of the code is stored, so issuing and checking a
+    code costs one hash instead of a full password hashing round.
+    """
+    code = get_random_string(CODE_LENGTH)
+    ConfirmationCode.objects.create(
+        user=user,
+        digest=get_code_digest(code),
+        expires=timezone.now() + settings.CONFIRMATION_CODE_LIFETIME
+    )
+    return code
+
+
+def redeem_code(email, code):
+    """Return the active user owning a valid code and spend the code."""
+    confirmation = ConfirmationCode.objects.select_related('user').filter(
+        digest=get_code_digest(code),
+        user__email=email,
+        user__is_active=True,
+        used=False,
+        expires__gt=timezone.now()
+    ).first()
+    if confirmation is None:
+        return None
+    # Concurrent requests with the same code race on this UPDATE, only one
+    # of them flips the flag.
+    if not ConfirmationCode.objects.filter(
+            pk=confirmation.pk, used=False).update(used=True):
+        return None
+    return confirmation.user
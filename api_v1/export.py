@@ -0,0 +1,97 @@
+import csv
+import json
+from itertools import islice
+
+from django.db.models import Q
+
+from .models import Comment, Review, Title
+
+CHUNK_SIZE = 2000
+
+
+def title_rows(since=None):
+    titles = Title.objects.order_by('pk').values_list(
+        'id', 'name', 'year', 'description', 'category__slug', 'rating'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    through = Title.genre.through.objects
+    while True:
+        chunk = list(islice(titles, CHUNK_SIZE))
+        if not chunk:
+            return
+        # iterator() skips prefetch_related, load genres per chunk instead.
+        genres = {}
+        for title_id, slug in through.filter(
+                title_id__in=[row[0] for row in chunk]).values_list(
+                'title_id', 'genre__slug'):
+            genres.setdefault(title_id, []).append(slug)
+        for row in chunk:
+            yield row + (genres.get(row[0], []),)
+
+
+def after_cursor(queryset, since):
+    """Rows after a ``(pub_date, id)`` cursor, in export order.
+
+    Rows sharing the cursor's pub_date are told apart by id, so none of
+    them is skipped. Without an id every row at the cursor's pub_date is
+    sent again.
+    """
+    if since is None:
+        return queryset
+    pub_date, pk = since
+    return queryset.filter(
+        Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk or 0))
+
+
+def review_rows(since=None):
+    reviews = after_cursor(Review.objects.order_by('pub_date', 'pk'), since)
+    return reviews.values_list(
+        'id', 'title_id', 'author__username', 'text', 'score', 'pub_date'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def comment_rows(since=None):
+    comments = after_cursor(
+        Comment.objects.order_by('pub_date', 'pk'), since)
+    return comments.values_list(
+        'id', 'review_id', 'author__username', 'text', 'pub_date'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+# resource -> (columns, row source, supports since)
+EXPORTS = {
+    'titles': (('id', 'name', 'year', 'description', 'category', 'rating',
+                'genre'), title_rows, False),
+    'reviews': (('id', 'title', 'author', 'text', 'score', 'pub_date'),
+                review_rows, True),
+    'comments': (('id', 'review', 'author', 'text', 'pub_date'),
+                 comment_rows, True),
+}
+
+
+def encode_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(columns, map(encode_value, row))),
+            ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """File-like object handing written CSV lines back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            ' '.join(value) if isinstance(value, list) else encode_value(value)
+            for value in row)
@@ -1,13 +1,43 @@
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
 from .models import Title
+from .search import get_search_index
 
 
 class TitleFilter(filters.FilterSet):
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
-    genre = filters.CharFilter(field_name='genre__slug')
+    genre = filters.CharFilter(method='filter_genre')
     category = filters.CharFilter(field_name='category__slug')
+    search = filters.CharFilter(method='filter_search')
+
+    def filter_genre(self, queryset, name, value):
+        # Driven from the genre's through rows, a probe per title would
+        # walk the whole ordering index for a rare genre.
+        return queryset.filter(pk__in=Title.genre.through.objects.filter(
+            genre__slug=value).values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        ids = get_search_index().search(value, settings.TITLE_SEARCH_LIMIT)
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ids).order_by(Case(
+            *[When(pk=pk, then=Value(position))
+              for position, pk in enumerate(ids)],
+            output_field=IntegerField()
+        ))
 
     class Meta:
         model = Title
         fields = ('name', 'genre', 'category', 'year',)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Keep relevance order of ``search`` results unless asked otherwise."""
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get('search'):
+            return None
+        return super().get_default_ordering(view)
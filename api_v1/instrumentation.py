@@ -0,0 +1,243 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name, help, buckets, RequestStats attribute
+METRICS = (
+    ('api_request_duration_seconds', 'Wall time of a request',
+     SECONDS_BUCKETS, 'duration'),
+    ('api_request_queries', 'Database queries run by a request',
+     QUERY_BUCKETS, 'queries'),
+    ('api_request_db_seconds', 'Time a request spent in the database',
+     SECONDS_BUCKETS, 'db_time'),
+    ('api_request_render_seconds', 'Time a request spent rendering its body',
+     SECONDS_BUCKETS, 'render_time'),
+    ('api_response_size_bytes', 'Size of a response body',
+     SIZE_BUCKETS, 'size'),
+)
+
+# Methods kept as a label, anything else is counted as OTHER_METHOD.
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+OTHER_METHOD = 'OTHER'
+OTHER_ENDPOINT = '<other>'
+
+_current = ContextVar('api_request_stats', default=None)
+
+
+class RequestStats:
+    """Counters of one request, also the ``execute_wrapper`` hook."""
+
+    def __init__(self, top_size):
+        self.top_size = top_size
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.size = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            # A bounded heap keeps only the slowest statements.
+            if len(self.statements) < self.top_size:
+                heapq.heappush(self.statements, (elapsed, sql))
+            else:
+                heapq.heappushpop(self.statements, (elapsed, sql))
+
+    def top_statements(self):
+        return [{'seconds': elapsed, 'sql': sql}
+                for elapsed, sql in sorted(self.statements, reverse=True)]
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            running += count
+            yield bound, running
+
+    def as_dict(self):
+        return {'count': self.count, 'sum': self.total,
+                'buckets': {str(bound): count
+                            for bound, count in self.cumulative()}}
+
+
+class Registry:
+    """Per-process histograms keyed by URL name and HTTP method.
+
+    Both labels are bounded: unknown methods share ``OTHER_METHOD`` and
+    endpoints past ``API_METRICS_MAX_ENDPOINTS`` share ``OTHER_ENDPOINT``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.slow = deque(maxlen=settings.API_SLOW_REQUEST_LOG_SIZE)
+
+    def record(self, endpoint, method, stats):
+        if method not in METHODS:
+            method = OTHER_METHOD
+        with self.lock:
+            key = (endpoint, method)
+            if (key not in self.endpoints and len(self.endpoints) >=
+                    settings.API_METRICS_MAX_ENDPOINTS):
+                key = (OTHER_ENDPOINT, method)
+            if key not in self.endpoints:
+                self.endpoints[key] = {
+                    attribute: Histogram(buckets)
+                    for _, _, buckets, attribute in METRICS}
+            for attribute, histogram in self.endpoints[key].items():
+                histogram.observe(getattr(stats, attribute))
+            if stats.duration >= settings.API_SLOW_REQUEST_SECONDS:
+                self.slow.append({
+                    'endpoint': endpoint, 'method': method,
+                    'seconds': stats.duration, 'queries': stats.queries,
+                    'statements': stats.top_statements()})
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'endpoints': [
+                    dict({'endpoint': endpoint, 'method': method},
+                         **{attribute: histogram.as_dict()
+                            for attribute, histogram in histograms.items()})
+                    for (endpoint, method), histograms in sorted(
+                        self.endpoints.items())],
+                'slow_requests': list(self.slow),
+            }
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            for name, help_text, _, attribute in METRICS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), histograms in sorted(
+                        self.endpoints.items()):
+                    histogram = histograms[attribute]
+                    labels = (f'endpoint="{escape_label(endpoint)}",'
+                              f'method="{method}"')
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+                    lines.append(
+                        f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+REGISTRY = Registry()
+
+
+class TimedRendererMixin:
+    """Add the time spent rendering a response body to its request stats."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        finally:
+            stats.render_time += time.perf_counter() - start
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match.route
+
+
+class PerformanceMiddleware:
+    """Record timing and query stats of every request into ``REGISTRY``.
+
+    The hot path is a few counters and a ``perf_counter`` call per query,
+    cheap enough to stay on in production. Streaming bodies are produced
+    after the middleware returns, so their queries are not counted.
+    Queries are counted on every database alias, replicas included.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats(settings.API_SLOW_REQUEST_TOP_SQL)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias_connection in connections.all():
+                    stack.enter_context(
+                        alias_connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        stats.duration = time.perf_counter() - start
+        if not response.streaming:
+            stats.size = len(response.content)
+        endpoint = get_endpoint(request)
+        REGISTRY.record(endpoint, request.method, stats)
+        if stats.duration >= settings.API_SLOW_REQUEST_SECONDS:
+            logger.warning(
+                'Slow request %s %s: %.3fs, %d queries, %.3fs in DB; '
+                'slowest SQL: %s', request.method, endpoint, stats.duration,
+                stats.queries, stats.db_time, stats.top_statements())
+        return response
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Record a message in the outbox, to be sent by ``send_outbox``.
+
+    Call it inside the transaction that creates the data the message is
+    about, so both are committed or rolled back together.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=','.join(recipient_list)
+    )
+
+
+def claim_outbox(batch_size, max_attempts, now):
+    """Reserve due messages for this worker and return them.
+
+    Claimed rows get ``next_attempt`` pushed past the claim timeout, so
+    other workers skip them until then; a worker that dies leaves them
+    due again. The UPDATE re-checks ``next_attempt``, which keeps two
+    workers from claiming the same row even where SELECT ... FOR UPDATE
+    is ignored.
+    """
+    claimed_until = now + timedelta(
+        seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    due = OutboxEmail.objects.filter(
+        sent__isnull=True, attempts__lt=max_attempts, next_attempt__lte=now)
+    with transaction.atomic():
+        ids = list(due.select_for_update(skip_locked=True).order_by(
+            'next_attempt', 'pk').values_list('pk', flat=True)[:batch_size])
+        due.filter(pk__in=ids).update(next_attempt=claimed_until)
+    return list(OutboxEmail.objects.filter(
+        pk__in=ids, next_attempt=claimed_until).order_by('pk'))
+
+
+def send_outbox(batch_size, max_attempts):
+    """Send one batch of due outbox messages over a single connection.
+
+    Failed messages are retried with exponential backoff until
+    ``max_attempts`` is reached; when the connection cannot be opened the
+    whole batch counts as failed. Returns ``(sent, failed)`` counts.
+    """
+    now = timezone.now()
+    batch = claim_outbox(batch_size, max_attempts, now)
+    if not batch:
+        return 0, 0
+    sent, failed = [], []
+
+    def fail(email, error):
+        email.attempts += 1
+        email.last_error = repr(error)
+        email.next_attempt = now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_BACKOFF * 2 ** (email.attempts - 1))
+        failed.append(email)
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            fail(email, error)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    email.recipients.split(','), connection=connection)
+                try:
+                    message.send()
+                except Exception as error:
+                    fail(email, error)
+                else:
+                    email.attempts += 1
+                    email.sent = now
+                    sent.append(email)
+        finally:
+            connection.close()
+    OutboxEmail.objects.bulk_update(
+        sent + failed, ('attempts', 'last_error', 'next_attempt', 'sent'))
+    return len(sent), len(failed)
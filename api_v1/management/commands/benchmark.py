@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from api_v1.benchmark import DEFAULT_SCALE, compare, dumps, run
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database with a synthetic catalogue and '
+            'benchmark every GET route of the API')
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Number of {name} (default {default})')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Sequential test client requests per route')
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Load generator threads, 0 skips the load phase')
+        parser.add_argument(
+            '--requests-per-thread', type=int, default=100)
+        parser.add_argument(
+            '--interface-clients', type=int, default=0,
+            help='Concurrent clients of an in-process WSGI vs ASGI '
+                 'comparison, 0 skips it')
+        parser.add_argument(
+            '--contention-seconds', type=float, default=0,
+            help='Seconds of concurrent comment reads and writes under the '
+                 'default and the tuned SQLite pragmas, 0 skips it')
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--output', help='Write the JSON result to this file')
+        parser.add_argument(
+            '--compare', help='Baseline JSON result to gate regressions on')
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Allowed latency growth against the baseline, 0.2 is 20%%')
+
+    def handle(self, *args, **options):
+        scale = {name: options[name] for name in DEFAULT_SCALE}
+        with tempfile.TemporaryDirectory() as directory:
+            # A file database lets the load generator threads open their
+            # own connections; the configured database is never touched.
+            test_settings = settings.DATABASES['default'].setdefault(
+                'TEST', {})
+            if settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+                test_settings['NAME'] = os.path.join(
+                    directory, 'benchmark.sqlite3')
+            old_config = setup_databases(0, interactive=False)
+            try:
+                result = run(scale, options['seed'], options['iterations'],
+                             options['threads'],
+                             options['requests_per_thread'],
+                             options['interface_clients'],
+                             options['contention_seconds'],
+                             options['readers'], options['writers'])
+            except RuntimeError as error:
+                raise CommandError(error)
+            finally:
+                teardown_databases(old_config, 0)
+        output = dumps(result)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                target.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                problems = compare(json.load(source), result,
+                                   options['max_regression'])
+            if problems:
+                raise CommandError(
+                    'Performance regressions:\n' + '\n'.join(problems))
+            self.stdout.write(self.style.SUCCESS('No regressions found'))
@@ -0,0 +1,135 @@
+import csv
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from api_v1.models import Category, Comment, Genre, Review, Title, User
+from api_v1.rankings import rebuild_rankings
+from api_v1.search import get_search_index
+
+# Files in dependency order with CSV column -> model attname renames.
+SOURCES = (
+    ('users.csv', User, {'description': 'bio'}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': 'category_id'}),
+    ('genre_title.csv', Title.genre.through, {}),
+    ('review.csv', Review, {'author': 'author_id'}),
+    ('comments.csv', Comment, {'author': 'author_id'}),
+)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Let bulk_create store dates from the file instead of now()."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Load CSV dumps from the data directory into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Directory with the CSV files')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk INSERT/UPDATE')
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Update rows that already exist instead of skipping them')
+
+    def handle(self, *args, **options):
+        loaded = []
+        for filename, model, renames in SOURCES:
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{filename}: not found, skipped')
+                continue
+            stored = model.objects.count()
+            with open(path, encoding='utf-8', newline='') as source:
+                rows, orphans = self.load(
+                    source, model, renames,
+                    options['batch_size'], options['upsert'])
+            loaded.append(model)
+            self.stdout.write(
+                f'{filename}: {rows} rows, '
+                f'{model.objects.count() - stored} inserted, '
+                f'{orphans} skipped for missing references')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), loaded):
+                cursor.execute(sql)
+        Title.objects.rebuild_ratings()
+        get_search_index().rebuild()
+        rebuild_rankings(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Import finished'))
+
+    def load(self, source, model, renames, batch_size, upsert):
+        reader = csv.DictReader(source)
+        columns = [renames.get(column, column) for column in reader.fieldnames]
+        try:
+            fields = {column: model._meta.get_field(column)
+                      for column in columns}
+        except Exception as error:
+            raise CommandError(f'{model.__name__}: {error}')
+        update_fields = [field.name for field in fields.values()
+                         if not field.primary_key]
+        relations = [field for field in fields.values() if field.is_relation]
+        rows = orphans = 0
+        with transaction.atomic(), keep_auto_now_add(model):
+            while True:
+                batch = [
+                    self.build(model, fields, columns, record)
+                    for record in islice(reader, batch_size)
+                ]
+                if not batch:
+                    break
+                rows += len(batch)
+                for field in relations:
+                    # Parents may have been skipped as conflicting rows,
+                    # drop their children instead of failing the import.
+                    ids = {getattr(obj, field.attname) for obj in batch}
+                    ids = set(field.related_model.objects.filter(
+                        pk__in=ids - {None}).values_list('pk', flat=True))
+                    kept = [obj for obj in batch
+                            if getattr(obj, field.attname) is None or
+                            getattr(obj, field.attname) in ids]
+                    orphans += len(batch) - len(kept)
+                    batch = kept
+                if upsert:
+                    existing = model.objects.in_bulk(
+                        [obj.pk for obj in batch]).keys()
+                    model.objects.bulk_update(
+                        [obj for obj in batch if obj.pk in existing],
+                        update_fields)
+                    batch = [obj for obj in batch if obj.pk not in existing]
+                # Rows clashing with stored ones or a unique constraint
+                # are skipped, so repeated runs are harmless.
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+        return rows, orphans
+
+    def build(self, model, fields, columns, record):
+        values = {}
+        for column, value in zip(columns, record.values()):
+            field = fields[column]
+            if value == '':
+                values[field.attname] = None if field.null else ''
+            else:
+                values[field.attname] = field.to_python(value)
+        if model is User:
+            values['password'] = make_password(None)
+        return model(**values)
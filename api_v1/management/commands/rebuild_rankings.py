@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api_v1.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = ('Recalculate title rankings, run periodically to move the '
+            'trending window and the bayesian mean')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Ranking rows inserted per query')
+
+    def handle(self, *args, **options):
+        created = rebuild_rankings(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rankings rebuilt with {created} rows'))
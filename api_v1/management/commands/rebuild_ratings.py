@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api_v1.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Recalculate stored title ratings from reviews'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ratings rebuilt for {updated} titles'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_v1.mail import send_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Messages sent over one backend connection')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Attempts before a message is given up')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of draining it once')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_outbox(
+                options['batch_size'], options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total_sent} emails, {total_failed} failed'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api_v1.sqlite import CHECKPOINT_MODES, get_status
+
+
+class Command(BaseCommand):
+    help = ('Report the effective SQLite pragmas of a database and the '
+            'state of its WAL checkpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--checkpoint', choices=CHECKPOINT_MODES, default='passive',
+            help='WAL checkpoint mode run to read the status, passive '
+                 'never blocks readers or writers')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                f'Database {options["database"]!r} is not SQLite')
+        status = get_status(connection, options['checkpoint'])
+        width = max(map(len, status['pragmas']))
+        for name, value in status['pragmas'].items():
+            self.stdout.write(f'{name:<{width}}  {value}')
+        checkpoint = status['checkpoint']
+        if checkpoint is None:
+            self.stdout.write('checkpoint: not in WAL mode')
+            return
+        self.stdout.write(
+            f'checkpoint ({checkpoint["mode"]}): '
+            f'{checkpoint["checkpointed_frames"]} of '
+            f'{checkpoint["wal_frames"]} WAL frames written back, '
+            f'WAL file {checkpoint["wal_bytes"]} bytes')
+        if checkpoint['busy']:
+            self.stdout.write(self.style.WARNING(
+                'Checkpoint was blocked by a reader or writer'))
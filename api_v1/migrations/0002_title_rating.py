@@ -0,0 +1,53 @@
+# Generated by Django 3.0.5 on 2026-10-18 16:58
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('api_v1', 'Title')
+    Review = apps.get_model('api_v1', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    Title.objects.update(
+        rating_sum=Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total')), 0),
+        rating_count=Coalesce(Subquery(
+            reviews.annotate(total=Count('pk')).values('total')), 0)
+    )
+    for title in Title.objects.filter(rating_count__gt=0):
+        title.rating = title.rating_sum / title.rating_count
+        title.save(update_fields=('rating',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(db_index=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='score',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1, message='Entered value must be between 1 and 10'), django.core.validators.MaxValueValidator(10, message='Entered value must be between 1 and 10')], verbose_name='Оценка'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
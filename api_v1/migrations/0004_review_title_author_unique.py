@@ -0,0 +1,37 @@
+# Generated by Django 3.0.5 on 2026-10-18 17:01
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def drop_duplicate_reviews(apps, schema_editor):
+    Title = apps.get_model('api_v1', 'Title')
+    Review = apps.get_model('api_v1', 'Review')
+    duplicates = Review.objects.order_by().values(
+        'title', 'author').annotate(first=Min('pk'), total=Count('pk')).filter(
+        total__gt=1)
+    for duplicate in duplicates:
+        Review.objects.filter(
+            title_id=duplicate['title'], author_id=duplicate['author']
+        ).exclude(pk=duplicate['first']).delete()
+        stats = Review.objects.filter(title_id=duplicate['title']).aggregate(
+            rating_sum=Sum('score'), rating_count=Count('pk'))
+        Title.objects.filter(pk=duplicate['title']).update(
+            rating_sum=stats['rating_sum'],
+            rating_count=stats['rating_count'],
+            rating=stats['rating_sum'] / stats['rating_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0003_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('title', 'author'), name='review_title_author_unique'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'api_v1_title_search'
+
+
+def normalize(text):
+    return (text or '').casefold().replace('ё', 'е')
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts5_available(connection):
+        return
+    Title = apps.get_model('api_v1', 'Title')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING '
+            f'fts5(name, description, tokenize="unicode61 remove_diacritics 2")')
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description) '
+            f'VALUES (%s, %s, %s)',
+            [(pk, normalize(name), normalize(description))
+             for pk, name, description in Title.objects.values_list(
+                'pk', 'name', 'description')])
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0007_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
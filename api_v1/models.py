@@ -1,5 +1,9 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 from .validators import (custom_year_validator, RANGE_ERROR_MESSAGE,
     MaxValueValidator, MinValueValidator)
@@ -90,6 +94,52 @@ class Genre(models.Model):
         ordering = ('name',)
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self, score_delta, count_delta):
+        """Shift stored rating by a review delta in a single UPDATE.
+
+        Every SET expression reads the old column values, so concurrent
+        writers never lose each other's increments.
+        """
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.update(
+            modified=timezone.now(),
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Case(
+                When(rating_count__lte=-count_delta, then=Value(None)),
+                default=ExpressionWrapper(
+                    Cast(rating_sum, FloatField()) / rating_count,
+                    output_field=FloatField()),
+                output_field=FloatField()
+            )
+        )
+
+    def rebuild_ratings(self):
+        """Recalculate stored rating from scratch for selected titles."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        with transaction.atomic():
+            self.update(
+                rating_sum=Coalesce(Subquery(
+                    reviews.annotate(total=Sum('score')).values('total')), 0),
+                rating_count=Coalesce(Subquery(
+                    reviews.annotate(total=Count('pk')).values('total')), 0)
+            )
+            return self.update(
+                modified=timezone.now(),
+                rating=Case(
+                    When(rating_count=0, then=Value(None)),
+                    default=ExpressionWrapper(
+                        Cast('rating_sum', FloatField()) / F('rating_count'),
+                        output_field=FloatField()),
+                    output_field=FloatField()
+                )
+            )
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=200,
@@ -122,10 +172,56 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Рейтинг'
+    )
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    # Written only by TitleQuerySet.update_rating and rebuild_ratings.
+    RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        # An update never writes back the rating this instance loaded, or
+        # review deltas committed since then would be lost.
+        if not self._state.adding and not force_insert:
+            if update_fields is None:
+                update_fields = [field.name
+                                 for field in self._meta.concrete_fields
+                                 if not field.primary_key]
+            update_fields = [name for name in update_fields
+                             if name not in self.RATING_FIELDS]
+        super().save(force_insert, force_update, using, update_fields)
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('year', 'name'),
+                         name='title_year_name_idx'),
+            models.Index(fields=('category', 'name'),
+                         name='title_category_name_idx'),
+            models.Index(fields=('modified',),
+                         name='title_modified_idx'),
+        )
 
 
 class Review(models.Model):
@@ -157,10 +253,46 @@ class Review(models.Model):
         verbose_name='Автор'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def lock_stored_values(self):
+        # Rating deltas are taken against the locked row, not against
+        # what this instance read earlier, so concurrent edits add up.
+        return Review.objects.select_for_update().filter(
+            pk=self.pk).values('title_id', 'score').first()
+
+    def save(self, *args, **kwargs):
+        # Keep the row and the title rating it feeds in one transaction.
+        with transaction.atomic():
+            if self.pk is not None and not self._state.adding:
+                self._loaded_values = self.lock_stored_values() or {}
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = self.lock_stored_values()
+            if stored is None:
+                # Deleted concurrently, its rating is already withdrawn.
+                return 0, {}
+            self._loaded_values = stored
+            return super().delete(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Рецензия'
         verbose_name_plural = 'Рецензии'
-        ordering = ('-pub_date', 'author',)
+        ordering = ('-pub_date', 'author_id',)
+        indexes = (
+            models.Index(fields=('title', '-pub_date', 'author'),
+                         name='review_title_feed_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('title', 'author'),
+                                    name='review_title_author_unique'),
+        )
 
 
 class Comment(models.Model):
@@ -171,6 +303,10 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
@@ -190,4 +326,118 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ('-pub_date', 'author',)
+        ordering = ('-pub_date', 'author_id',)
+        indexes = (
+            models.Index(fields=('review', '-pub_date', 'author'),
+                         name='comment_review_feed_idx'),
+        )
+
+
+class TitleRanking(models.Model):
+    scope = models.CharField(
+        max_length=50,
+        verbose_name='Рейтинг'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    votes = models.PositiveIntegerField(
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        verbose_name='Средняя оценка'
+    )
+    bayesian = models.FloatField(
+        verbose_name='Байесовская оценка'
+    )
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = (
+            models.UniqueConstraint(fields=('scope', 'title'),
+                                    name='ranking_scope_title_unique'),
+        )
+        indexes = (
+            models.Index(fields=('scope', '-rating', 'title'),
+                         name='ranking_scope_rating_idx'),
+            models.Index(fields=('scope', '-bayesian', 'title'),
+                         name='ranking_scope_bayesian_idx'),
+            models.Index(fields=('scope', '-votes', 'title'),
+                         name='ranking_scope_votes_idx'),
+        )
+
+
+class ConfirmationCode(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='confirmation_codes',
+        verbose_name='Пользователь'
+    )
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='HMAC кода'
+    )
+    expires = models.DateTimeField(
+        verbose_name='Действителен до'
+    )
+    used = models.BooleanField(
+        default=False,
+        verbose_name='Использован'
+    )
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
+
+
+class OutboxEmail(models.Model):
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема'
+    )
+    body = models.TextField(
+        verbose_name='Текст'
+    )
+    from_email = models.CharField(
+        max_length=254,
+        verbose_name='Отправитель'
+    )
+    recipients = models.TextField(
+        verbose_name='Получатели'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество попыток'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt',)
+        indexes = (
+            models.Index(fields=('sent', 'next_attempt'),
+                         name='outbox_pending_idx'),
+        )
@@ -0,0 +1,41 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class FeedCursorPagination(CursorPagination):
+    ordering = ('-pub_date', 'author_id',)
+
+
+class FeedPagination(PageNumberPagination):
+    """Page number pagination with opt-in keyset mode for review feeds.
+
+    Clients switch to cursor mode with ``?pagination=cursor`` and then follow
+    the ``next``/``previous`` links, which carry a ``cursor`` parameter.
+    Cursor pages skip the COUNT query and the OFFSET scan.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.mode_query_param) ==
+                self.cursor_mode or
+                FeedCursorPagination.cursor_query_param
+                in request.query_params):
+            self.cursor_paginator = FeedCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RankingPagination(CursorPagination):
+    """Keyset pages over a ranking index, sorted by the view's score."""
+
+    def get_ordering(self, request, queryset, view):
+        return (f'-{view.get_score_field()}', 'title',)
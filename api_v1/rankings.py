@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
+from django.utils import timezone
+
+from .models import Review, Title, TitleRanking
+
+OVERALL = 'all'
+TRENDING = 'trending'
+MEAN_KEY = 'ranking-mean'
+
+
+def genre_scope(slug):
+    return f'genre:{slug}'
+
+
+def category_scope(slug):
+    return f'category:{slug}'
+
+
+def bayesian(rating, votes, mean):
+    """Pull an average towards the global mean while it has few votes."""
+    prior = settings.RANKING_PRIOR_VOTES
+    return (votes * rating + prior * mean) / (votes + prior)
+
+
+def get_ranking_cache():
+    return caches[settings.RANKING_CACHE]
+
+
+def compute_mean():
+    totals = Title.objects.aggregate(
+        score=Sum('rating_sum'), votes=Sum('rating_count'))
+    mean = totals['score'] / totals['votes'] if totals['votes'] else 0.0
+    get_ranking_cache().set(MEAN_KEY, mean, None)
+    return mean
+
+
+def get_mean():
+    # Scores refreshed between rebuilds use the mean of the last rebuild,
+    # whichever worker ran it.
+    mean = get_ranking_cache().get(MEAN_KEY)
+    return compute_mean() if mean is None else mean
+
+
+def trending_since():
+    return timezone.now() - timedelta(days=settings.RANKING_TRENDING_DAYS)
+
+
+def make_ranking(scope, title_id, rating, votes, mean):
+    return TitleRanking(scope=scope, title_id=title_id, votes=votes,
+                        rating=rating, bayesian=bayesian(rating, votes, mean))
+
+
+def update_title_rankings(title_id):
+    """Refresh the rows of one title in every scope it is ranked in.
+
+    The cost depends on the title's genres and recent reviews only, so it
+    is cheap enough to run after each review write. The title row stays
+    locked until its rows are replaced, so concurrent refreshes of one
+    title cannot insert the same scope twice.
+    """
+    with transaction.atomic():
+        if not Title.objects.select_for_update().filter(
+                pk=title_id).values_list('pk').first():
+            return
+        title = Title.objects.select_related('category').prefetch_related(
+            'genre').get(pk=title_id)
+        rows = []
+        if title.rating_count:
+            mean = get_mean()
+            scopes = [OVERALL] + [genre_scope(genre.slug)
+                                  for genre in title.genre.all()]
+            if title.category is not None:
+                scopes.append(category_scope(title.category.slug))
+            rows = [make_ranking(scope, title_id, title.rating,
+                                 title.rating_count, mean)
+                    for scope in scopes]
+            recent = Review.objects.filter(
+                title_id=title_id,
+                pub_date__gte=trending_since()).aggregate(
+                    rating=Avg('score'), votes=Count('pk'))
+            if recent['votes']:
+                rows.append(make_ranking(TRENDING, title_id,
+                                         recent['rating'], recent['votes'],
+                                         mean))
+        TitleRanking.objects.filter(title_id=title_id).delete()
+        TitleRanking.objects.bulk_create(rows)
+
+
+def ranking_rows(mean):
+    titles = Title.objects.filter(rating_count__gt=0).order_by()
+    for title_id, rating, votes in titles.values_list(
+            'pk', 'rating', 'rating_count').iterator():
+        yield make_ranking(OVERALL, title_id, rating, votes, mean)
+    for slug, title_id, rating, votes in titles.filter(
+            category__isnull=False).values_list(
+                'category__slug', 'pk', 'rating', 'rating_count').iterator():
+        yield make_ranking(category_scope(slug), title_id, rating, votes,
+                           mean)
+    for slug, title_id, rating, votes in titles.filter(
+            genre__isnull=False).values_list(
+                'genre__slug', 'pk', 'rating', 'rating_count').iterator():
+        yield make_ranking(genre_scope(slug), title_id, rating, votes, mean)
+    recent = Review.objects.filter(
+        pub_date__gte=trending_since()).order_by().values('title').annotate(
+            rating=Avg('score'), votes=Count('pk'))
+    for row in recent.iterator():
+        yield make_ranking(TRENDING, row['title'], row['rating'],
+                           row['votes'], mean)
+
+
+def rebuild_rankings(batch_size=1000):
+    """Recompute every ranking table with a fresh global mean."""
+    created = 0
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        batch = []
+        for ranking in ranking_rows(compute_mean()):
+            batch.append(ranking)
+            if len(batch) == batch_size:
+                created += len(TitleRanking.objects.bulk_create(batch))
+                batch = []
+        created += len(TitleRanking.objects.bulk_create(batch))
+    return created
@@ -0,0 +1,97 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY_COOKIE = 'db-primary'
+PRIMARY_COOKIE_SALT = 'api_v1.routing'
+
+_replica = ContextVar('api_replica_alias', default=None)
+
+
+def get_pin_cache():
+    return caches[settings.DATABASE_PRIMARY_PIN_CACHE]
+
+
+def get_pin_key(user_id):
+    return f'db-primary:{user_id}'
+
+
+def pin_to_primary(request, response):
+    """Keep the author of a write on the primary while replicas catch up.
+
+    The signed cookie covers anonymous and browser clients, the entry in
+    the shared ``DATABASE_PRIMARY_PIN_CACHE`` covers JWT clients which do
+    not keep cookies, whichever worker their next request reaches.
+    """
+    seconds = settings.DATABASE_PRIMARY_STICKY_SECONDS
+    response.set_signed_cookie(PRIMARY_COOKIE, '1', salt=PRIMARY_COOKIE_SALT,
+                               max_age=seconds, httponly=True)
+    if request.user and request.user.is_authenticated:
+        get_pin_cache().set(get_pin_key(request.user.pk), True, seconds)
+
+
+def is_pinned(request):
+    if request.get_signed_cookie(
+            PRIMARY_COOKIE, None, salt=PRIMARY_COOKIE_SALT,
+            max_age=settings.DATABASE_PRIMARY_STICKY_SECONDS) is not None:
+        return True
+    return bool(request.user and request.user.is_authenticated and
+                get_pin_cache().get(get_pin_key(request.user.pk)))
+
+
+@contextmanager
+def use_primary():
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads of a ``ReplicaReadMixin`` request to a read replica.
+
+    Anything outside such a request, every write and all user lookups
+    done for authentication stay on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a view from one of ``DATABASE_REPLICAS``.
+
+    The replica is chosen after authentication, so a user pinned by a
+    recent write keeps reading the primary and sees their own changes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and request.method in SAFE_METHODS and
+                not is_pinned(request)):
+            self.replica_token = _replica.set(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            _replica.reset(token)
+            self.replica_token = None
+        if (request.method not in SAFE_METHODS and
+                response.status_code < 400):
+            pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,216 @@
+import math
+import re
+import threading
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from .caching import on_commit
+from .models import Title
+
+SEARCH_TABLE = 'api_v1_title_search'
+VERSION_KEY = 'title-search-version'
+
+# Title matches weigh more than description matches when ranking.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Casefold text and merge 'ё' into 'е' as Russian readers expect."""
+    return (text or '').casefold().replace('ё', 'е')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+class FTS5Index:
+    """Title index stored in an SQLite FTS5 table ranked with bm25."""
+
+    def add(self, title):
+        self.add_many([title])
+
+    def add_many(self, titles):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE} '
+                f'(rowid, name, description) VALUES (%s, %s, %s)',
+                [(title.pk, normalize(title.name),
+                  normalize(title.description)) for title in titles])
+
+    def remove(self, title_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', (title_id,))
+
+    def rebuild(self):
+        titles = Title.objects.values_list(
+            'pk', 'name', 'description').iterator()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, name, description) '
+                f'VALUES (%s, %s, %s)',
+                ((pk, normalize(name), normalize(description))
+                 for pk, name, description in titles))
+
+    def search(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY bm25({SEARCH_TABLE}, %s, %s) LIMIT %s',
+                (match, NAME_WEIGHT, DESCRIPTION_WEIGHT, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PythonIndex:
+    """In-process inverted index for databases without FTS5.
+
+    Each process keeps its own copy. Title saves publish a new version in
+    the shared ``TITLE_SEARCH_CACHE`` once committed, and a process holding
+    an older one rebuilds on its next search. Versions form a chain: only
+    the first writer after a version claims its successor, so a process
+    that misses another worker's publish knows it is stale. Rating updates
+    do not save titles, so review writes never trigger a rebuild.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        self.tokens = []
+        self.version = None
+
+    def get_version(self):
+        return caches[settings.TITLE_SEARCH_CACHE].get_or_set(
+            VERSION_KEY, uuid.uuid4().hex, None)
+
+    def publish(self, seen, current):
+        # A random token instead of a counter, so concurrent bumps can not
+        # collapse into one value. ``add`` is the compare-and-set, atomic on
+        # Redis and memcached.
+        cache = caches[settings.TITLE_SEARCH_CACHE]
+        version = uuid.uuid4().hex
+        claimed = cache.add(f'{VERSION_KEY}:{seen}:next', version, None)
+        cache.set(VERSION_KEY, version, None)
+        with self.lock:
+            self.version = version if current and claimed else None
+
+    def index(self, title_id, name, description):
+        weights = defaultdict(float)
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        self.documents[title_id] = list(weights)
+        for token, weight in weights.items():
+            self.postings[token][title_id] = weight
+
+    def unindex(self, title_id):
+        for token in self.documents.pop(title_id, ()):
+            self.postings[token].pop(title_id, None)
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def refresh(self):
+        # Read first, a write landing during the reload bumps it again.
+        self.version = self.get_version()
+        self.postings.clear()
+        self.documents.clear()
+        for row in Title.objects.values_list(
+                'pk', 'name', 'description').iterator():
+            self.index(*row)
+        self.tokens = sorted(self.postings)
+
+    def rebuild(self):
+        with self.lock:
+            self.refresh()
+
+    def add(self, title):
+        self.add_many([title])
+
+    def add_many(self, titles):
+        with self.lock:
+            seen = self.get_version()
+            for title in titles:
+                self.unindex(title.pk)
+                self.index(title.pk, title.name, title.description)
+            self.tokens = sorted(self.postings)
+        on_commit(self.publish, seen, self.version == seen)
+
+    def remove(self, title_id):
+        with self.lock:
+            seen = self.get_version()
+            self.unindex(title_id)
+            self.tokens = sorted(self.postings)
+        on_commit(self.publish, seen, self.version == seen)
+
+    def expand(self, prefix):
+        position = bisect_left(self.tokens, prefix)
+        while (position < len(self.tokens) and
+               self.tokens[position].startswith(prefix)):
+            yield self.tokens[position]
+            position += 1
+
+    def search(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self.lock:
+            if self.version != self.get_version():
+                self.refresh()
+            scores = None
+            for prefix in tokens:
+                matches = defaultdict(float)
+                for token in self.expand(prefix):
+                    postings = self.postings[token]
+                    idf = math.log(1 + len(self.documents) / len(postings))
+                    for title_id, weight in postings.items():
+                        matches[title_id] += weight * idf
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {title_id: score + matches[title_id]
+                              for title_id, score in scores.items()
+                              if title_id in matches}
+        ranked = sorted(scores, key=lambda title_id: (-scores[title_id],
+                                                      title_id))
+        return ranked[:limit]
+
+
+_index = None
+
+
+def get_search_index():
+    global _index
+    if _index is None:
+        backend = settings.TITLE_SEARCH_BACKEND
+        if backend == 'auto':
+            backend = 'fts5' if fts5_available(connection) else 'python'
+        _index = FTS5Index() if backend == 'fts5' else PythonIndex()
+    return _index
+
+
+def reset_search_index():
+    global _index
+    _index = None
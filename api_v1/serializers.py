@@ -1,7 +1,15 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
 from rest_framework_simplejwt.tokens import AccessToken
 
-from .models import User, Review, Comment, Category, Genre, Title
+from .confirmation import redeem_code
+from .models import (User, Review, Comment, Category, Genre, Title,
+                     TitleRanking)
+from .signals import titles_bulk_saved
 from .validators import (custom_year_validator, MaxValueValidator,
     MinValueValidator, RANGE_ERROR_MESSAGE)
 
@@ -23,15 +31,22 @@ class ReviewSerializer(serializers.ModelSerializer):
         )
     )
 
-    def validate(self, data):
-        title_id = self.context.get('view').kwargs.get('title_id')
-        author = self.context.get('request').user
-        if (self.context.get('request').method == 'POST' and
-            Review.objects.filter(title_id=title_id,
-                                  author_id=author.id).exists()):
+    def create(self, validated_data):
+        # One review per author is enforced by the database constraint,
+        # so concurrent POSTs cannot both pass a separate pre-check.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # Backends do not all name the failed constraint, so look for
+            # the review it protects; any other failure propagates.
+            if not Review.objects.filter(
+                    title=validated_data['title'],
+                    author=validated_data['author']).exists():
+                raise
             raise serializers.ValidationError(
-                {'detail': 'You have already left a review about this title'})
-        return data
+                {'detail': ['You have already left a review '
+                            'about this title']})
 
     class Meta:
         fields = '__all__'
@@ -56,10 +71,7 @@ class CustomTokenObtainSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
 
     def validate(self, data):
-        email = data['email']
-        confirmation_code = data['confirmation_code']
-        user = User.objects.filter(
-            email=email, password=confirmation_code, is_active=1).first()
+        user = redeem_code(data['email'], data['confirmation_code'])
         if user is None:
             raise serializers.ValidationError(
                 {'detail': 'User doesnt exists or blocked or '
@@ -83,15 +95,13 @@ class UserSerializer(serializers.ModelSerializer):
 class EmailSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
-    def validate(self, data):
-        email = data['email']
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError(
-                {'detail': 'Entered email is exists'})
-        return data
-
     def create(self, validated_data):
-        return User.objects.create(**validated_data)
+        # A known email gets a fresh code for its user, e.g. once the last
+        # one expired or was spent.
+        email = validated_data.pop('email')
+        user, _ = User.objects.get_or_create(
+            email=email, defaults=validated_data)
+        return user
 
 
 class CategoriesSerializer(serializers.ModelSerializer):
@@ -108,12 +118,81 @@ class GenresSerializer(serializers.ModelSerializer):
         model = Genre
 
 
+def get_slug_lookups(context):
+    """Slug -> object memo shared by every serializer of one request."""
+    request = context.get('request')
+    if request is None:
+        return context.setdefault('slug_lookups', {})
+    if not hasattr(request, 'slug_lookups'):
+        request.slug_lookups = {}
+    return request.slug_lookups
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_value_many(data)
+
+
+class BatchedSlugRelatedField(serializers.SlugRelatedField):
+    """Slug field resolving all slugs of a payload with one ``__in`` query.
+
+    Resolved and missing slugs are memoized for the rest of the request,
+    so repeated slugs and nested or listed serializers query them once.
+    """
+    default_error_messages = {
+        'many_do_not_exist': 'Objects with {slug_name} in {values} '
+                             'do not exist.',
+    }
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def resolve(self, slugs):
+        key = (self.get_queryset().model, self.slug_field)
+        lookups = get_slug_lookups(self.context).setdefault(key, {})
+        unknown = {slug for slug in slugs
+                   if isinstance(slug, str) and slug not in lookups}
+        if unknown:
+            found = {getattr(obj, self.slug_field): obj
+                     for obj in self.get_queryset().filter(
+                         **{f'{self.slug_field}__in': unknown})}
+            for slug in unknown:
+                lookups[slug] = found.get(slug)
+        return lookups
+
+    def to_internal_value(self, data):
+        return self.to_internal_value_many([data])[0]
+
+    def to_internal_value_many(self, data):
+        if not all(isinstance(slug, str) for slug in data):
+            self.fail('invalid')
+        lookups = self.resolve(data)
+        missing = [slug for slug in data if lookups[slug] is None]
+        if len(missing) == 1:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=missing[0])
+        if missing:
+            self.fail('many_do_not_exist', slug_name=self.slug_field,
+                      values=', '.join(missing))
+        return [lookups[slug] for slug in data]
+
+
 class TitleSerializer(serializers.ModelSerializer):
     rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count',)
 
 
 class TitlesSerializerGet(TitleSerializer):
@@ -122,12 +201,12 @@ class TitlesSerializerGet(TitleSerializer):
 
 
 class TitlesSerializerPost(TitleSerializer):
-    category = serializers.SlugRelatedField(
+    category = BatchedSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all(),
         required=False
     )
-    genre = serializers.SlugRelatedField(
+    genre = BatchedSlugRelatedField(
         slug_field='slug',
         queryset=Genre.objects.all(),
         many=True
@@ -136,3 +215,153 @@ class TitlesSerializerPost(TitleSerializer):
         required=False,
         validators=(custom_year_validator,)
     )
+
+
+class TitleRankingSerializer(serializers.ModelSerializer):
+    title = TitlesSerializerGet()
+
+    class Meta:
+        fields = ('votes', 'rating', 'bayesian', 'title',)
+        model = TitleRanking
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Validate and write a list of titles with a fixed number of queries.
+
+    Every slug, id and name referenced by the list is fetched with one query
+    per model before the items are validated, then titles and their genre
+    rows are written with bulk queries in one transaction.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prefetch([item for item in data if isinstance(item, dict)])
+        return super().to_internal_value(data)
+
+    def prefetch(self, items):
+        def slugs(values):
+            return {value for value in values if isinstance(value, str)}
+
+        genres = [item.get('genre') for item in items]
+        names = [item.get('name') for item in items]
+        self.child.fields['category'].resolve(
+            slugs(item.get('category') for item in items))
+        self.child.fields['genre'].child_relation.resolve(slugs(
+            slug for values in genres if isinstance(values, list)
+            for slug in values))
+        self.context['bulk_titles'] = Title.objects.in_bulk(
+            self.title_ids(items))
+        self.context['bulk_names'] = dict(Title.objects.filter(
+            name__in=slugs(names)).values_list('name', 'pk'))
+        self.context['bulk_name_counts'] = Counter(
+            name for name in names if isinstance(name, str))
+
+    def title_ids(self, items):
+        # Coerced by the id field itself, so "5" is prefetched like 5.
+        ids = set()
+        for item in items:
+            if item.get('id') is None:
+                continue
+            try:
+                ids.add(self.child.fields['id'].to_internal_value(
+                    item['id']))
+            except serializers.ValidationError:
+                pass
+        return ids
+
+    def create(self, validated_data):
+        titles, created, updated, genres = [], [], [], {}
+        fields = {'modified'}
+        for item in validated_data:
+            title = self.context['bulk_titles'].get(item.pop('id', None))
+            # A repeated slug would insert the same genre row twice.
+            genres[item['name']] = list(dict.fromkeys(item.pop('genre')))
+            if title is None:
+                title = Title(**item)
+                titles.append(title)
+                created.append(title)
+                continue
+            for field, value in item.items():
+                setattr(title, field, value)
+            title.modified = timezone.now()
+            fields.update(item)
+            titles.append(title)
+            updated.append(title)
+        try:
+            with transaction.atomic():
+                self.write(created, updated, fields, genres)
+        except IntegrityError:
+            # A name taken by a concurrent request since the prefetch; any
+            # other failure is not the client's to fix.
+            if not self.names_taken(created, updated):
+                raise
+            raise serializers.ValidationError(
+                {'detail': ['Title names must stay unique']})
+        return titles
+
+    def names_taken(self, created, updated):
+        """Whether a name of the list belongs to another stored title."""
+        owners = {title.name: title.pk for title in updated}
+        stored = Title.objects.filter(
+            name__in=[title.name for title in created + updated])
+        return any(owners.get(name) != pk
+                   for name, pk in stored.values_list('name', 'pk'))
+
+    def write(self, created, updated, fields, genres):
+        through = Title.genre.through
+        Title.objects.bulk_create(created)
+        Title.objects.bulk_update(updated, fields)
+        # Not every backend returns primary keys from a bulk insert.
+        ids = dict(Title.objects.filter(
+            name__in=[title.name for title in created]).values_list(
+                'name', 'pk'))
+        for title in created:
+            title.pk = ids[title.name]
+        through.objects.filter(
+            title_id__in=[title.pk for title in updated]).delete()
+        through.objects.bulk_create([
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title in created + updated
+            for genre in genres[title.name]])
+        titles_bulk_saved.send(
+            sender=Title, created=created, updated=updated)
+
+
+class TitleBulkSerializer(TitleSerializer):
+    id = serializers.IntegerField(required=False)
+    category = BatchedSlugRelatedField(
+        slug_field='slug',
+        queryset=Category.objects.all(),
+        required=False
+    )
+    genre = BatchedSlugRelatedField(
+        slug_field='slug',
+        queryset=Genre.objects.all(),
+        many=True
+    )
+    year = serializers.IntegerField(
+        required=False,
+        validators=(custom_year_validator,)
+    )
+
+    class Meta(TitleSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+        extra_kwargs = {'name': {'validators': []}}
+
+    def validate_id(self, value):
+        if value not in self.context['bulk_titles']:
+            raise serializers.ValidationError('Title does not exist')
+        return value
+
+    def validate_name(self, value):
+        if self.context['bulk_name_counts'][value] > 1:
+            raise serializers.ValidationError(
+                'Title name is repeated in the request')
+        return value
+
+    def validate(self, data):
+        owner = self.context['bulk_names'].get(data['name'])
+        if owner is not None and owner != data.get('id'):
+            raise serializers.ValidationError(
+                {'name': ['Title with this name already exists']})
+        return data
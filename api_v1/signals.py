@@ -0,0 +1,174 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .authentication import invalidate_user_cache
+from .caching import bump_version, evict_object, on_commit
+from .models import (Category, Comment, Genre, Review, Title, TitleRanking,
+                     User)
+from .rankings import category_scope, genre_scope, update_title_rankings
+from .search import get_search_index
+from .sqlite import apply_pragmas
+from .suggest import SUGGEST_INDEXES
+
+# Sent by bulk title writes, which skip the per-instance model signals.
+titles_bulk_saved = Signal(providing_args=('created', 'updated'))
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        Title.objects.filter(pk=instance.title_id).update_rating(
+            instance.score, 1)
+    elif 'score' not in loaded or 'title_id' not in loaded:
+        Title.objects.filter(pk=instance.title_id).rebuild_ratings()
+    elif loaded['title_id'] == instance.title_id:
+        Title.objects.filter(pk=instance.title_id).update_rating(
+            instance.score - loaded['score'], 0)
+    else:
+        Title.objects.filter(pk=loaded['title_id']).update_rating(
+            -loaded['score'], -1)
+        Title.objects.filter(pk=instance.title_id).update_rating(
+            instance.score, 1)
+    # Only cached pages rendering these titles carry their rating.
+    for title_id in {instance.title_id, loaded.get('title_id')} - {None}:
+        on_commit(evict_object, 'titles', title_id)
+        on_commit(update_title_rankings, title_id)
+    on_commit(bump_version, 'title-ratings')
+    instance._loaded_values = {
+        'title_id': instance.title_id, 'score': instance.score}
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    title_id = loaded.get('title_id', instance.title_id)
+    Title.objects.filter(pk=title_id).update_rating(
+        -loaded.get('score', instance.score), -1)
+    on_commit(evict_object, 'titles', title_id)
+    on_commit(update_title_rankings, title_id)
+    on_commit(bump_version, 'title-ratings')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user_cache(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Reviews and comments render the author's username.
+    if not created:
+        now = timezone.now()
+        Title.objects.filter(reviews__author=instance).update(modified=now)
+        Comment.objects.filter(author=instance).update(modified=now)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_changed(sender, **kwargs):
+    # Filtered and sorted lists may gain or lose any title.
+    on_commit(bump_version, 'titles')
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    get_search_index().add(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    get_search_index().remove(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_touched(sender, instance, **kwargs):
+    Title.objects.filter(category=instance).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_touched(sender, instance, **kwargs):
+    Title.objects.filter(genre=instance).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    on_commit(bump_version, 'categories')
+    on_commit(bump_version, 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    on_commit(bump_version, 'genres')
+    on_commit(bump_version, 'titles')
+
+
+@receiver(post_save, sender=Title)
+def title_ranked(sender, instance, created, **kwargs):
+    # A new title has no reviews yet, later saves may change its category.
+    if not created:
+        on_commit(update_title_rankings, instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    title_ids = (pk_set or ()) if reverse else (instance.pk,)
+    for title_id in title_ids:
+        on_commit(update_title_rankings, title_id)
+
+
+@receiver(post_delete, sender=Category)
+def category_unranked(sender, instance, **kwargs):
+    TitleRanking.objects.filter(scope=category_scope(instance.slug)).delete()
+
+
+@receiver(post_delete, sender=Genre)
+def genre_unranked(sender, instance, **kwargs):
+    TitleRanking.objects.filter(scope=genre_scope(instance.slug)).delete()
+
+
+SUGGEST_KINDS = {Title: 'titles', Genre: 'genres', Category: 'categories'}
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def suggest_saved(sender, instance, **kwargs):
+    on_commit(SUGGEST_INDEXES[SUGGEST_KINDS[sender]].add, instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def suggest_deleted(sender, instance, **kwargs):
+    on_commit(SUGGEST_INDEXES[SUGGEST_KINDS[sender]].remove, instance.pk)
+
+
+@receiver(titles_bulk_saved, sender=Title)
+def titles_bulk_changed(sender, created, updated, **kwargs):
+    titles = created + updated
+    on_commit(bump_version, 'titles')
+    get_search_index().add_many(titles)
+    for title in titles:
+        on_commit(SUGGEST_INDEXES['titles'].add, title)
+    # New titles have no reviews, updated ones may change their scopes.
+    for title in updated:
+        if title.rating_count:
+            on_commit(update_title_rankings, title.pk)
+
+
+@receiver(connection_created)
+def connection_tuned(sender, connection, **kwargs):
+    apply_pragmas(connection)
@@ -0,0 +1,77 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+NAME_RE = re.compile(r'^[a-z_]+$')
+VALUE_RE = re.compile(r'^-?\w+$')
+
+# Reported by sqlite_status next to the configured pragmas.
+STATUS_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size',
+                  'cache_size', 'temp_store', 'page_size', 'page_count',
+                  'freelist_count', 'wal_autocheckpoint')
+
+# SQLite reports these pragmas as numbers.
+PRAGMA_LABELS = {
+    'synchronous': {0: 'off', 1: 'normal', 2: 'full', 3: 'extra'},
+    'temp_store': {0: 'default', 1: 'file', 2: 'memory'},
+}
+
+CHECKPOINT_MODES = ('passive', 'full', 'restart', 'truncate')
+
+
+def get_pragmas(pragmas=None):
+    """Validated ``(name, value)`` pairs, ``SQLITE_PRAGMAS`` by default.
+
+    An empty value leaves that pragma at the SQLite default.
+    """
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    result = []
+    for name, value in pragmas.items():
+        value = str(value).strip()
+        if value == '':
+            continue
+        if not NAME_RE.match(name) or not VALUE_RE.match(value):
+            raise ImproperlyConfigured(
+                f'Invalid SQLite pragma {name!r} = {value!r}')
+        result.append((name, value))
+    return result
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Run the pragmas on a freshly opened SQLite connection.
+
+    They go straight to the DB-API connection, so query logs, execute
+    wrappers and query count assertions never see them.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in get_pragmas(pragmas):
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def get_status(connection, checkpoint='passive'):
+    """Effective pragmas and WAL checkpoint state of a connection."""
+    names = list(STATUS_PRAGMAS) + [
+        name for name, _ in get_pragmas() if name not in STATUS_PRAGMAS]
+    pragmas = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            value = row[0] if row else None
+            pragmas[name] = PRAGMA_LABELS.get(name, {}).get(value, value)
+        status = {'pragmas': pragmas, 'checkpoint': None}
+        if pragmas['journal_mode'] == 'wal':
+            cursor.execute(f'PRAGMA wal_checkpoint({checkpoint.upper()})')
+            busy, log, checkpointed = cursor.fetchone()
+            wal = f'{connection.settings_dict["NAME"]}-wal'
+            status['checkpoint'] = {
+                'mode': checkpoint, 'busy': bool(busy), 'wal_frames': log,
+                'checkpointed_frames': checkpointed,
+                'wal_bytes': os.path.getsize(wal)
+                if os.path.exists(wal) else 0,
+            }
+    return status
@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .models import Category, Genre, Title
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """Sorted arrays of name keys answering prefix queries with bisect.
+
+    Names are keyed as a whole and from every later word, so "шоу" also
+    suggests "Побег из Шоушенка"; matches at the start of a name come first.
+    Queries never reach the database: the index is loaded off the request
+    path and kept current by model signals.
+    """
+
+    def __init__(self, queryset, fields):
+        self.queryset = queryset
+        self.fields = fields
+        self.lock = threading.Lock()
+        self.heads = []
+        self.tails = []
+        self.items = {}
+        self.built = None
+        # Changes seen while a rebuild loads, replayed onto its result.
+        self.pending = None
+
+    def entries(self, item):
+        words = tokenize(item['name'])
+        heads = [(' '.join(words), item['id'])]
+        tails = [(' '.join(words[position:]), item['id'])
+                 for position in range(1, len(words))]
+        return heads, tails
+
+    def rebuild(self):
+        with self.lock:
+            self.pending = []
+        try:
+            items = {item['id']: item for item in
+                     self.queryset.values(*self.fields).iterator()}
+        except BaseException:
+            with self.lock:
+                self.pending = None
+            raise
+        heads, tails = [], []
+        for item in items.values():
+            item_heads, item_tails = self.entries(item)
+            heads += item_heads
+            tails += item_tails
+        heads.sort()
+        tails.sort()
+        with self.lock:
+            self.items, self.heads, self.tails = items, heads, tails
+            for item, item_id in self.pending:
+                self.discard(item_id)
+                if item is not None:
+                    self.insert(item)
+            self.pending = None
+            self.built = time.monotonic()
+
+    def add(self, obj):
+        item = {field: getattr(obj, field) for field in self.fields}
+        with self.lock:
+            self.discard(item['id'])
+            self.insert(item)
+            if self.pending is not None:
+                self.pending.append((item, item['id']))
+
+    def remove(self, item_id):
+        with self.lock:
+            self.discard(item_id)
+            if self.pending is not None:
+                self.pending.append((None, item_id))
+
+    def insert(self, item):
+        self.items[item['id']] = item
+        for keys, entries in zip((self.heads, self.tails),
+                                 self.entries(item)):
+            for entry in entries:
+                insort(keys, entry)
+
+    def discard(self, item_id):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        for keys, entries in zip((self.heads, self.tails),
+                                 self.entries(item)):
+            for entry in entries:
+                position = bisect_left(keys, entry)
+                if position < len(keys) and keys[position] == entry:
+                    del keys[position]
+
+    def suggest(self, prefix, limit):
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        found = []
+        with self.lock:
+            for keys in (self.heads, self.tails):
+                position = bisect_left(keys, (prefix,))
+                while (len(found) < limit and position < len(keys) and
+                       keys[position][0].startswith(prefix)):
+                    item_id = keys[position][1]
+                    if item_id not in found:
+                        found.append(item_id)
+                    position += 1
+            return [self.items[item_id] for item_id in found]
+
+
+SUGGEST_INDEXES = {
+    'titles': PrefixIndex(Title.objects.all(), ('id', 'name')),
+    'genres': PrefixIndex(Genre.objects.all(), ('id', 'name', 'slug')),
+    'categories': PrefixIndex(Category.objects.all(), ('id', 'name', 'slug')),
+}
+
+
+def build_suggest_indexes():
+    for index in SUGGEST_INDEXES.values():
+        index.rebuild()
+
+
+def refresh_suggest_indexes(interval):
+    # Reloads pick up writes other workers made, signals only reach the
+    # process that saved.
+    while True:
+        try:
+            build_suggest_indexes()
+        except DatabaseError:
+            logger.exception('Suggest indexes could not be loaded')
+        finally:
+            connections.close_all()
+        time.sleep(interval)
+
+
+_refresher = None
+
+
+def start_suggest_refresher():
+    """Load the indexes off the request path and keep reloading them.
+
+    A daemon thread reloads every ``SUGGEST_REBUILD_INTERVAL`` seconds; the
+    WSGI and ASGI entry points start it.
+    """
+    global _refresher
+    if _refresher is None:
+        _refresher = threading.Thread(
+            target=refresh_suggest_indexes,
+            args=(settings.SUGGEST_REBUILD_INTERVAL,),
+            name='suggest-refresher', daemon=True)
+        _refresher.start()
+    return _refresher
+
+
+def reset_suggest_indexes():
+    """Empty the loaded indexes, ``build_suggest_indexes`` reloads them."""
+    for index in SUGGEST_INDEXES.values():
+        with index.lock:
+            index.items, index.heads, index.tails = {}, [], []
+            index.built = None
@@ -0,0 +1,43 @@
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthThrottle(SimpleRateThrottle):
+    """Sliding window limit for the auth endpoints.
+
+    Request history is kept in the ``AUTH_THROTTLE_CACHE`` cache, so the
+    counters can live in a backend shared between workers.
+    """
+    cache = caches[settings.AUTH_THROTTLE_CACHE]
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AuthIPThrottle(AuthThrottle):
+    scope = 'auth_ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class AuthEmailThrottle(AuthThrottle):
+    scope = 'auth_email'
+
+    def get_ident_value(self, request):
+        # A body that is not an object is left to the serializer's 400.
+        if not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get('email')
+        if not isinstance(email, str):
+            return None
+        return email.strip().lower()
@@ -1,9 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .models import Category, Genre
 from .views import (UserRegisterView, TokenObtainView,
                     UsersViewset, ReviewsViewSet, CommentsViewSet,
-                    TitlesViewset, GenresViewSet, CategoriesViewSet)
+                    TitlesViewset, GenresViewSet, CategoriesViewSet,
+                    ExportView, SuggestView, RankingView,
+                    MetricsView, PrometheusMetricsView)
 
 router = DefaultRouter()
 router.register(
@@ -40,6 +43,22 @@ auth_patterns = [
 urlpatterns = [
     path('v1/auth/',
          include(auth_patterns)),
+    path('v1/export/<str:resource>/',
+         ExportView.as_view()),
+    path('v1/suggest/',
+         SuggestView.as_view()),
+    path('v1/rankings/',
+         RankingView.as_view()),
+    path('v1/rankings/trending/',
+         RankingView.as_view(trending=True)),
+    path('v1/rankings/genres/<slug:slug>/',
+         RankingView.as_view(parent_model=Genre)),
+    path('v1/rankings/categories/<slug:slug>/',
+         RankingView.as_view(parent_model=Category)),
+    path('v1/metrics/',
+         MetricsView.as_view()),
+    path('v1/metrics/prometheus/',
+         PrometheusMetricsView.as_view()),
     path('v1/',
          include(router.urls)),
 ]
@@ -1,29 +1,48 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
-from django.core.management.utils import get_random_secret_key
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework.backends import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
-from rest_framework.generics import CreateAPIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import CreateAPIView, ListAPIView
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer, ModelSerializer
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenViewBase
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
 from api_yamdb.settings import EMAIL_FROM, EMAIL_SUBJ, EMAIL_TEXT
-from .filters import TitleFilter
-from .models import Review, Title, Genre, Category
+from .caching import CachedListMixin, CachedReadMixin
+from .conditional import ConditionalListMixin, ConditionalReadMixin
+from .confirmation import issue_code
+from .export import EXPORTS, csv_lines, ndjson_lines
+from .filters import TitleFilter, TitleOrderingFilter
+from .instrumentation import REGISTRY
+from .mail import queue_mail
+from .pagination import FeedPagination, RankingPagination
+from .models import Review, Title, Genre, Category, TitleRanking
 from .permissions import ReadOnly, IsAdmin, IsModerator, IsOwner
 from .serializers import (TitlesSerializerGet, TitlesSerializerPost,
                           UserSerializer, EmailSerializer,
                           CustomTokenObtainSerializer, ReviewSerializer,
                           CommentSerializer, GenresSerializer,
-                          CategoriesSerializer)
+                          CategoriesSerializer, TitleRankingSerializer,
+                          TitleBulkSerializer)
+from .rankings import OVERALL, TRENDING, category_scope, genre_scope
+from .routing import ReplicaReadMixin
+from .suggest import SUGGEST_INDEXES
+from .throttling import AuthEmailThrottle, AuthIPThrottle
 
 User = get_user_model()
 
@@ -33,6 +52,30 @@ class CreateDelListViewset(CreateModelMixin, DestroyModelMixin,
     pass
 
 
+class EagerLoadingMixin:
+    """Plan select_related/prefetch_related from nested serializer fields.
+
+    Forward relations rendered by a nested serializer are joined, many
+    relations are prefetched with only the columns the child renders.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for name, field in self.get_serializer_class()().fields.items():
+            if isinstance(field, ListSerializer):
+                child = field.child
+                if isinstance(child, ModelSerializer):
+                    columns = [nested.source
+                               for nested in child.fields.values()
+                               if nested.source != '*']
+                    queryset = queryset.prefetch_related(Prefetch(
+                        field.source,
+                        queryset=child.Meta.model.objects.only(*columns)))
+            elif isinstance(field, ModelSerializer):
+                queryset = queryset.select_related(field.source)
+        return queryset
+
+
 class UsersViewset(ModelViewSet):
     lookup_field = 'username'
     permission_classes = (IsAdmin,)
@@ -44,7 +87,8 @@ class UsersViewset(ModelViewSet):
     @action(detail=False, methods=('GET', 'PATCH',),
             permission_classes=(IsAuthenticated,))
     def me(self, request):
-        user = self.request.user
+        # request.user only carries the cached auth fields, load the profile.
+        user = User.objects.get(pk=request.user.pk)
         if request.method == 'GET':
             serializer = self.get_serializer(user)
         else:
@@ -55,89 +99,325 @@ class UsersViewset(ModelViewSet):
         return Response(serializer.data)
 
     def perform_create(self, serializer):
-        password = str(get_random_secret_key())[:10]
-        password_hash = make_password(password)
-        serializer.save(password=password_hash, is_active=True)
+        serializer.save(password=make_password(None), is_active=True)
 
 
 class UserRegisterView(CreateAPIView):
     queryset = User.objects.all()
     serializer_class = EmailSerializer
+    throttle_classes = (AuthIPThrottle, AuthEmailThrottle,)
 
     def perform_create(self, serializer):
         email = serializer.validated_data['email']
         username = email.split('@')[0]
-        password = str(get_random_secret_key())[:10]
-        password_hash = make_password(password)
-        send_mail(
-            EMAIL_SUBJ,
-            EMAIL_TEXT[0].format(email=email, confirm_code=password_hash),
-            EMAIL_FROM,
-            [email],
-            fail_silently=False,
-        )
-        serializer.save(
-            username=username, password=password_hash, email=email)
+        with transaction.atomic():
+            user = serializer.save(
+                username=username, password=make_password(None), email=email)
+            queue_mail(
+                EMAIL_SUBJ,
+                EMAIL_TEXT.format(email=email, confirm_code=issue_code(user)),
+                EMAIL_FROM,
+                [email],
+            )
 
 
 class TokenObtainView(TokenViewBase):
     serializer_class = CustomTokenObtainSerializer
+    throttle_classes = (AuthIPThrottle, AuthEmailThrottle,)
+
+
+class NestedParentMixin:
+    """Resolve the parents of a nested route once per request.
 
+    The comment route checks the whole ``title -> review`` chain with one
+    query, and the resolved objects are reused by every later call.
+    """
 
-class ReviewsViewSet(ModelViewSet):
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id'))
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'))
+            self._title = self._review.title
+        return self._review
+
+
+class ReviewsViewSet(ReplicaReadMixin, ConditionalReadMixin, NestedParentMixin,
+                     ModelViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = FeedPagination
     permission_classes = (IsAuthenticated|ReadOnly,
         IsOwner|IsAdmin|IsModerator|ReadOnly,)
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_title().reviews.select_related('author')
+
+    def get_list_validators(self):
+        # Every review write touches the title through its rating update.
+        title = self.get_title()
+        return title.modified.isoformat(), title.modified
+
+    get_object_validators = get_list_validators
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentsViewSet(ModelViewSet):
+class CommentsViewSet(ReplicaReadMixin, ConditionalReadMixin,
+                      NestedParentMixin, ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = FeedPagination
     permission_classes = (IsAuthenticated|ReadOnly,
         IsOwner|IsAdmin|IsModerator|ReadOnly,)
 
     def get_queryset(self):
-        reviews = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return reviews.comments.all()
+        return self.get_review().comments.select_related('author')
+
+    def get_list_validators(self):
+        # A delete leaves max(modified) alone, so only the ETag, which
+        # also counts the rows, can tell a collection apart.
+        stats = self.get_review().comments.order_by().aggregate(
+            count=Count('pk'), modified=Max('modified'))
+        if stats['modified'] is None:
+            return '0', None
+        return f'{stats["count"]}:{stats["modified"].isoformat()}', None
+
+    def get_object_validators(self):
+        comments = self.get_review().comments.filter(pk=self.kwargs.get('pk'))
+        modified = comments.values_list('modified', flat=True).first()
+        if modified is None:
+            return None, None
+        return modified.isoformat(), modified
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
 
 
-class CategoriesViewSet(CreateDelListViewset):
-    queryset = Category.objects.all()
-    serializer_class = CategoriesSerializer
+class NameSlugViewset(ReplicaReadMixin, CachedListMixin, ConditionalListMixin,
+                      CreateDelListViewset):
     permission_classes = (IsAdmin|ReadOnly,)
     lookup_field = 'slug'
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
 
+    def get_list_validators(self):
+        # The dictionaries are tiny, hashing their rows is cheaper than
+        # rendering them.
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            'slug', 'name')
+        return repr(list(rows)), None
+
+
+class CategoriesViewSet(NameSlugViewset):
+    queryset = Category.objects.all()
+    serializer_class = CategoriesSerializer
+    cache_namespace = 'categories'
+
 
-class GenresViewSet(CreateDelListViewset):
+class GenresViewSet(NameSlugViewset):
     queryset = Genre.objects.all()
     serializer_class = GenresSerializer
-    permission_classes = (IsAdmin|ReadOnly,)
-    lookup_field = 'slug'
-    filter_backends = (SearchFilter,)
-    search_fields = ('name',)
+    cache_namespace = 'genres'
 
 
-class TitlesViewset(ModelViewSet):
+class TitlesViewset(ReplicaReadMixin, CachedReadMixin, ConditionalReadMixin,
+                    EagerLoadingMixin, ModelViewSet):
     permission_classes = (IsAdmin|ReadOnly,)
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    cache_namespace = 'titles'
+    queryset = Title.objects.order_by('name')
     filterset_class = TitleFilter
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter,)
+    ordering_fields = ('name', 'year', 'rating',)
+    ordering = ('name',)
+
+    def get_cache_namespaces(self, request):
+        # Any review may move a title across pages sorted by rating.
+        if 'rating' in request.query_params.get('ordering', ''):
+            return ('titles', 'title-ratings',)
+        return ('titles',)
+
+    def get_list_validators(self):
+        # Every filter matches a title at most once, no DISTINCT needed.
+        queryset = self.filter_queryset(self.get_queryset())
+        stats = queryset.order_by().aggregate(
+            count=Count('pk'), modified=Max('modified'))
+        if stats['modified'] is None:
+            return '0', None
+        # No Last-Modified, see CommentsViewSet.get_list_validators.
+        return f'{stats["count"]}:{stats["modified"].isoformat()}', None
+
+    def get_object_validators(self):
+        modified = Title.objects.filter(pk=self.kwargs.get('pk')).values_list(
+            'modified', flat=True).first()
+        if modified is None:
+            return None, None
+        return modified.isoformat(), modified
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return TitlesSerializerGet
         return TitlesSerializerPost
+
+    @action(detail=False, methods=('POST',))
+    def bulk(self, request):
+        """Create titles, or update those given with ``id``, from a list.
+
+        The list is written only when every item is valid, otherwise the
+        errors are returned in the order of the items. The status is 201
+        when a title was created and 200 when every item was an update.
+        """
+        if (isinstance(request.data, list) and
+                len(request.data) > settings.TITLE_BULK_MAX_ITEMS):
+            return Response(
+                {'detail': [f'Send at most {settings.TITLE_BULK_MAX_ITEMS} '
+                            f'titles at once']},
+                status=status.HTTP_400_BAD_REQUEST)
+        serializer = TitleBulkSerializer(
+            data=request.data, many=True,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        created = any(item.get('id') is None
+                      for item in serializer.validated_data)
+        positions = {title.pk: position
+                     for position, title in enumerate(serializer.save())}
+        titles = sorted(
+            Title.objects.filter(pk__in=positions).select_related(
+                'category').prefetch_related('genre'),
+            key=lambda title: positions[title.pk])
+        return Response(TitlesSerializerGet(titles, many=True).data,
+                        status=status.HTTP_201_CREATED if created
+                        else status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """Stream a whole resource as NDJSON or CSV without pagination.
+
+    ``?output=csv`` switches from NDJSON. ``?since=<pub_date>`` with
+    ``since_id=<id>``, both taken from the last row received, limits
+    reviews and comments to the rows exported after it.
+    """
+    permission_classes = (IsAdmin,)
+    formats = {
+        'ndjson': (ndjson_lines, 'application/x-ndjson'),
+        'csv': (csv_lines, 'text/csv'),
+    }
+
+    def get(self, request, resource):
+        if resource not in EXPORTS:
+            return Response({'detail': 'Unknown resource'},
+                            status=status.HTTP_404_NOT_FOUND)
+        columns, rows, incremental = EXPORTS[resource]
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.formats:
+            return Response({'output': ['Must be ndjson or csv']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is not None and timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            if since is None or not incremental:
+                return Response(
+                    {'since': ['Expected a pub_date of reviews or comments']},
+                    status=status.HTTP_400_BAD_REQUEST)
+            since_id = request.query_params.get('since_id')
+            if since_id is not None and not since_id.isdigit():
+                return Response({'since_id': ['Expected an integer id']},
+                                status=status.HTTP_400_BAD_REQUEST)
+            since = (since, since_id and int(since_id))
+        lines, content_type = self.formats[output]
+        return StreamingHttpResponse(
+            lines(columns, rows(since)), content_type=content_type)
+
+
+class SuggestView(APIView):
+    """Prefix suggestions for titles, genres and categories.
+
+    Answers come from in-memory indexes, so typing in a search box does
+    not reach the database.
+    """
+
+    def get(self, request):
+        kinds = request.query_params.get('type')
+        kinds = kinds.split(',') if kinds else list(SUGGEST_INDEXES)
+        if not set(kinds) <= set(SUGGEST_INDEXES):
+            return Response(
+                {'type': [f'Must be one of {", ".join(SUGGEST_INDEXES)}']},
+                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.SUGGEST_LIMIT))
+        except ValueError:
+            limit = settings.SUGGEST_LIMIT
+        limit = max(1, min(limit, settings.SUGGEST_MAX_LIMIT))
+        query = request.query_params.get('q', '')
+        return Response({kind: SUGGEST_INDEXES[kind].suggest(query, limit)
+                         for kind in kinds})
+
+
+class RankingView(ListAPIView):
+    """Precomputed title rankings: overall, per genre, per category, trending.
+
+    ``?method=`` sorts by ``average``, ``bayesian`` or ``votes``; each one
+    reads a page straight off its ``(scope, score)`` index.
+    """
+    serializer_class = TitleRankingSerializer
+    pagination_class = RankingPagination
+    score_fields = {
+        'average': 'rating',
+        'bayesian': 'bayesian',
+        'votes': 'votes',
+    }
+    parent_scopes = {Genre: genre_scope, Category: category_scope}
+    parent_model = None
+    trending = False
+
+    def get_scope(self):
+        if self.trending:
+            return TRENDING
+        if self.parent_model is None:
+            return OVERALL
+        parent = get_object_or_404(
+            self.parent_model, slug=self.kwargs.get('slug'))
+        return self.parent_scopes[self.parent_model](parent.slug)
+
+    def get_score_field(self):
+        method = self.request.query_params.get(
+            'method', 'votes' if self.trending else 'average')
+        if method not in self.score_fields:
+            raise ValidationError(
+                {'method': [f'Must be one of {", ".join(self.score_fields)}']})
+        return self.score_fields[method]
+
+    def get_queryset(self):
+        return TitleRanking.objects.filter(
+            scope=self.get_scope()).select_related(
+                'title__category').prefetch_related(Prefetch(
+                    'title__genre',
+                    queryset=Genre.objects.only('name', 'slug')))
+
+
+class MetricsView(APIView):
+    """Request histograms of this process per URL name and method."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(REGISTRY.snapshot())
+
+
+class PrometheusMetricsView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(REGISTRY.prometheus(),
+                            content_type='text/plain; version=0.0.4')
@@ -1,7 +1,14 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from api_v1.asgi import ThreadPoolASGIHandler  # noqa: E402
+from api_v1.suggest import start_suggest_refresher  # noqa: E402
+
+application = ThreadPoolASGIHandler()
+
+start_suggest_refresher()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_v1.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,9 +75,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Local stand-in for a read replica, e.g. a copy of db.sqlite3; it only
+    # takes reads once listed in DATABASE_REPLICAS
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['api_v1.routing.ReplicaRouter']
+
+# Pragmas run on every new SQLite connection: WAL lets readers go on while
+# a review is written. SQLITE_<PRAGMA> environment variables override them,
+# an empty one keeps the SQLite default, e.g. SQLITE_MMAP_SIZE=
+SQLITE_PRAGMAS = {
+    name: os.environ.get(f'SQLITE_{name.upper()}', value)
+    for name, value in (
+        ('busy_timeout', 5000),
+        ('journal_mode', 'wal'),
+        ('synchronous', 'normal'),
+        ('mmap_size', 256 * 1024 * 1024),
+        ('cache_size', -16000),
+        ('temp_store', 'memory'),
+    )
 }
 
+# Aliases serving safe requests of the API viewsets, and how long a client
+# reads the primary after a write so it sees its own changes
+DATABASE_REPLICAS = []
+
+DATABASE_PRIMARY_STICKY_SECONDS = 10
+
+# Cache alias holding the primary pins of JWT clients, which must be seen
+# by every worker
+DATABASE_PRIMARY_PIN_CACHE = 'shared'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -121,15 +155,31 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 # Include REST FRAMEWORK with rules
 REST_FRAMEWORK = {
         'DEFAULT_AUTHENTICATION_CLASSES': [
-            'rest_framework_simplejwt.authentication.JWTAuthentication',
+            'api_v1.authentication.CachedJWTAuthentication',
         ],
         'DEFAULT_PERMISSION_CLASSES': [
             'rest_framework.permissions.AllowAny',
         ],
+        # The stock renderers, timed by api_v1.instrumentation
+        'DEFAULT_RENDERER_CLASSES': [
+            'api_v1.instrumentation.TimedJSONRenderer',
+            'api_v1.instrumentation.TimedBrowsableAPIRenderer',
+        ],
         'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
         'PAGE_SIZE': 100,
+        # Proxies in front of the app whose X-Forwarded-For entries are
+        # trusted; 0 keys per-IP throttles on REMOTE_ADDR, so a client
+        # cannot reset its limit by sending its own header
+        'NUM_PROXIES': 0,
+        'DEFAULT_THROTTLE_RATES': {
+            'auth_ip': '30/min',
+            'auth_email': '5/min',
+        },
     }
 
+# Cache alias holding request history of the auth endpoint throttles
+AUTH_THROTTLE_CACHE = 'default'
+
 # Include Email Backend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
@@ -137,6 +187,15 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_FROM = 'api_yamdb@yamdb.ru'
 
+# How long an emailed confirmation code can be exchanged for a token
+CONFIRMATION_CODE_LIFETIME = timedelta(days=1)
+
+# Seconds before the first retry of a failed outbox email, doubled per attempt
+EMAIL_OUTBOX_BACKOFF = 60
+
+# Seconds a worker keeps claimed outbox emails before others may take them
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 300
+
 EMAIL_SUBJ = 'Thank you for registering on API YamDB'
 
 EMAIL_TEXT = ('Dont reply on this email!!! You just registered on API YamDB '
@@ -144,6 +203,81 @@ EMAIL_TEXT = ('Dont reply on this email!!! You just registered on API YamDB '
              'send POST request to auth/token/ with email and confirmation_'
              'code "{confirm_code}". Token will return in response body.')
 
+# Cache backend shared by auth and API helpers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Entries every worker must agree on, such as the auth snapshots that
+    # carry a user's role; point it at Redis or memcached across hosts
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache', 'shared'),
+    },
+}
+
+# Cache alias and timeout for anonymous catalogue responses. Evictions run
+# in the worker that saved the change, so the alias must be shared for
+# other workers to stop serving the old pages.
+API_CACHE = 'shared'
+
+API_CACHE_TIMEOUT = 60 * 15
+
+# Title full-text search: 'fts5' (SQLite only), 'python' for the in-process
+# index or 'auto' to pick FTS5 when the database supports it
+TITLE_SEARCH_BACKEND = 'auto'
+
+TITLE_SEARCH_LIMIT = 1000
+
+# Cache alias with the version of the 'python' search index, so every
+# worker sees that a title's text changed elsewhere
+TITLE_SEARCH_CACHE = 'shared'
+
+# Titles accepted by one POST to /api/v1/titles/bulk/
+TITLE_BULK_MAX_ITEMS = 1000
+
+# Suggest endpoint: default and maximal number of items per type, and how
+# often each server process reloads its prefix indexes in the background to
+# see other workers' writes
+SUGGEST_LIMIT = 10
+
+SUGGEST_MAX_LIMIT = 50
+
+SUGGEST_REBUILD_INTERVAL = 300
+
+# Votes of the global mean added to every title by the bayesian ranking
+RANKING_PRIOR_VOTES = 5
+
+RANKING_TRENDING_DAYS = 7
+
+# Cache alias with the global mean of the last ranking rebuild, used by
+# every worker that refreshes a single title
+RANKING_CACHE = 'shared'
+
+# Threads running views under ASGI, further requests wait on the event loop
+ASGI_THREADS = 16
+
+# Per-endpoint request metrics served on /api/v1/metrics/; requests slower
+# than the threshold are logged and kept with their slowest SQL statements
+API_METRICS_ENABLED = True
+
+API_SLOW_REQUEST_SECONDS = 1.0
+
+API_SLOW_REQUEST_TOP_SQL = 5
+
+API_SLOW_REQUEST_LOG_SIZE = 50
+
+# Distinct endpoint labels kept by the metrics, later ones share '<other>'
+API_METRICS_MAX_ENDPOINTS = 200
+
+# Cache alias and seconds a JWT user's auth fields stay cached between DB
+# lookups. A change of the user deletes the entry, which only reaches every
+# worker when the alias is shared; with a per-process cache a demoted or
+# deactivated user keeps their old rights on other workers for the timeout.
+JWT_USER_CACHE = 'shared'
+
+JWT_USER_CACHE_TIMEOUT = 300
+
 # Set simplejwt options
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(weeks=5200),
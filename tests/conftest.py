@@ -1,4 +1,33 @@
+import copy
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.test.utils import override_settings
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_query_plan',
+    'tests.fixtures.fixture_query_budget',
     # 'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def shared_cache_location(tmp_path_factory):
+    # The shared alias points at the deployment's cache directory, which
+    # clear_cache must never wipe.
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting['shared']['LOCATION'] = str(
+        tmp_path_factory.mktemp('shared-cache'))
+    with override_settings(CACHES=caches_setting):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(shared_cache_location):
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    yield
+    for alias in settings.CACHES:
+        caches[alias].clear()
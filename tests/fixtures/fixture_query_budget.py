@@ -0,0 +1,69 @@
+import tracemalloc
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Per request budgets: (queries, peak allocated KiB). Lists must stay
+# within them whatever the page size, so an N+1 in a serializer fails.
+BUDGETS = {
+    'titles-list': (4, 1024),
+    'titles-detail': (3, 256),
+    'reviews-list': (3, 512),
+    'reviews-detail': (2, 256),
+    'comments-list': (4, 512),
+    'comments-detail': (3, 256),
+}
+
+_usage = {}
+
+
+@pytest.fixture
+def query_budget():
+    """Fail when the block runs more queries or allocates more than allowed.
+
+    The report lists the captured SQL; the worst usage of every endpoint is
+    printed in the terminal summary.
+    """
+    @contextmanager
+    def budget(endpoint):
+        queries, kib = BUDGETS[endpoint]
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.clear_traces()
+        else:
+            tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                yield
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        used = len(context.captured_queries)
+        worst = _usage.get(endpoint, (0, 0))
+        _usage[endpoint] = (max(used, worst[0]), max(peak, worst[1]))
+        if used > queries:
+            sql = '\n'.join(f'{number}. {query["sql"]}' for number, query
+                            in enumerate(context.captured_queries, 1))
+            pytest.fail(f'{endpoint}: {used} queries over the budget of '
+                        f'{queries}:\n{sql}', pytrace=False)
+        if peak > kib:
+            pytest.fail(f'{endpoint}: {peak:.0f} KiB allocated over the '
+                        f'budget of {kib} KiB', pytrace=False)
+
+    return budget
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _usage:
+        return
+    terminalreporter.section('query budgets')
+    terminalreporter.write_line(
+        f'{"endpoint":<20}{"queries":>12}{"peak KiB":>16}')
+    for endpoint, (used, peak) in sorted(_usage.items()):
+        queries, kib = BUDGETS[endpoint]
+        terminalreporter.write_line(
+            f'{endpoint:<20}{f"{used}/{queries}":>12}'
+            f'{f"{peak:.0f}/{kib}":>16}')
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+
+# Dictionaries small enough to be read whole, e.g. for a list fingerprint.
+SMALL_TABLES = ('api_v1_category', 'api_v1_genre')
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problem(sql, detail):
+    """Name the plan step reading a whole table or index or sorting rows.
+
+    Sorting rows picked by a key list (prefetches of the current page) or
+    by a key subquery (titles of one genre) is bounded by those keys and is
+    not reported. An index scan without a
+    search constraint is accepted for COUNT queries, which read every row
+    anyway, for pages without a WHERE clause, which stop after LIMIT rows
+    in index order, and for ``SMALL_TABLES``.
+    """
+    if 'TEMP B-TREE' in detail:
+        keyed = ' IN (%s' in sql or ' IN (SELECT ' in sql
+        return None if keyed else 'temp B-tree sort'
+    if not detail.startswith('SCAN ') or 'CONSTANT ROW' in detail:
+        return None
+    if 'INDEX' not in detail:
+        return 'full table scan'
+    if ' WHERE ' not in sql and (sql.startswith('SELECT COUNT(') or
+                                 ' LIMIT ' in sql):
+        return None
+    if detail.split()[1] in SMALL_TABLES:
+        return None
+    return 'full index scan'
+
+
+@pytest.fixture
+def assert_indexed_plans():
+    """Fail when a SELECT run inside the block is not served by an index.
+
+    Every query is re-run with ``EXPLAIN QUERY PLAN`` after the block, so
+    dropping or reordering an index breaks the tests instead of production.
+    """
+    if connection.vendor != 'sqlite':
+        pytest.skip('Query plans are audited on SQLite only')
+
+    @contextmanager
+    def audit():
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            yield
+        problems = []
+        for sql, params in queries:
+            for detail in explain(sql, params):
+                problem = plan_problem(sql, detail)
+                if problem:
+                    problems.append(f'{problem} ({detail}) in {sql}')
+        assert not problems, '\n'.join(problems)
+
+    return audit
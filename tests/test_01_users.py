@@ -1,6 +1,9 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
 
+from api_v1.authentication import get_user_cache_key
 from .common import create_users_api, auth_client
 
 
@@ -287,3 +290,36 @@ class Test01UserAPI:
             'Проверьте, что при PATCH запросе `/api/v1/users/me/` с токеном авторизации возвращается статус 200'
         assert test_moderator.first_name == 'NewTest', \
             'Проверьте, что при PATCH запросе `/api/v1/users/me/` изменяете данные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12_users_auth_cache(self, user_client, django_assert_num_queries):
+        user, moderator = create_users_api(user_client)
+        client_user = auth_client(user)
+        client_user.get('/api/v1/categories/')
+        with django_assert_num_queries(2):
+            client_user.get('/api/v1/categories/')
+        response = client_user.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        assert response.status_code == 403, \
+            'Проверьте, что при POST запросе `/api/v1/categories/` с токеном обычного пользователя ' \
+            'возвращается статус 403'
+        user_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        response = client_user.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        assert response.status_code == 201, \
+            'Проверьте, что после изменения роли через `/api/v1/users/{username}/` ' \
+            'права пользователя обновляются'
+        user_client.delete(f'/api/v1/users/{user.username}/')
+        response = client_user.get('/api/v1/categories/')
+        assert response.status_code == 401, \
+            'Проверьте, что после удаления пользователя его токен перестаёт работать'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_13_users_auth_cache_shared(self, user_client, settings):
+        user, moderator = create_users_api(user_client)
+        client_user = auth_client(user)
+        client_user.get('/api/v1/categories/')
+        cache = caches[settings.JWT_USER_CACHE]
+        assert not isinstance(cache, LocMemCache) and cache.get(get_user_cache_key(user.id)) is not None, \
+            'Проверьте, что данные пользователя для аутентификации хранятся в общем для всех процессов кэше'
+        user_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert cache.get(get_user_cache_key(user.id)) is None, \
+            'Проверьте, что изменение пользователя удаляет его данные из общего кэша'
@@ -1,5 +1,13 @@
+import json
+
 import pytest
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 
+from api_v1.models import Title
+from api_v1.serializers import TitleBulkListSerializer
+from api_v1.search import PythonIndex, VERSION_KEY, reset_search_index
 from .common import create_users_api, auth_client, create_genre, create_categories, create_titles
 
 
@@ -194,3 +202,210 @@ class Test04TitleAPI:
         user, moderator = create_users_api(user_client)
         self.check_permissions(user, 'обычного пользователя', titles, categories, genres)
         self.check_permissions(moderator, 'модератора', titles, categories, genres)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_titles_list_queries(self, client, user_client, django_assert_max_num_queries):
+        _, categories, genres = create_titles(user_client)
+        for number in range(20):
+            data = {'name': f'Серия {number}', 'year': 2001, 'genre': [genres[0]['slug'], genres[2]['slug']],
+                    'category': categories[number % 2]['slug']}
+            user_client.post('/api/v1/titles/', data=data)
+        with django_assert_max_num_queries(4):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 22, \
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращаются все произведения'
+
+    @pytest.mark.parametrize('backend', ('fts5', 'python'))
+    @pytest.mark.django_db(transaction=True)
+    def test_06_titles_search(self, client, user_client, settings, backend):
+        settings.TITLE_SEARCH_BACKEND = backend
+        reset_search_index()
+        try:
+            titles, categories, genres = create_titles(user_client)
+            data = {'name': 'Ёлки', 'year': 2010, 'genre': [genres[1]['slug']],
+                    'category': categories[0]['slug'], 'description': 'Новогодний поворот судьбы'}
+            user_client.post('/api/v1/titles/', data=data)
+            response = client.get('/api/v1/titles/?search=ПОВОРОТ')
+            names = [title['name'] for title in response.json()['results']]
+            assert names == ['Поворот туда', 'Ёлки'], \
+                'Проверьте, что при GET запросе `/api/v1/titles/?search=` результаты упорядочены по релевантности ' \
+                'без учёта регистра'
+            response = client.get('/api/v1/titles/?search=елк')
+            assert [title['name'] for title in response.json()['results']] == ['Ёлки'], \
+                'Проверьте, что поиск `/api/v1/titles/?search=` находит слова по префиксу и не различает `ё` и `е`'
+            user_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Проект поворот'})
+            response = client.get('/api/v1/titles/?search=поворот&genre=drama')
+            assert [title['name'] for title in response.json()['results']] == ['Проект поворот'], \
+                'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        finally:
+            reset_search_index()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_titles_bulk(self, client, user_client, django_assert_max_num_queries):
+        titles, categories, genres = create_titles(user_client)
+        data = [
+            {'id': titles[0]['id'], 'name': 'Поворот обратно', 'year': 2001, 'genre': [genres[2]['slug']],
+             'category': categories[1]['slug'], 'description': 'Продолжение'},
+        ] + [
+            {'name': f'Сериал {number}', 'year': 2010, 'genre': [genres[0]['slug'], genres[1]['slug']],
+             'category': categories[0]['slug'], 'description': None}
+            for number in range(30)
+        ]
+        response = client.post('/api/v1/titles/bulk/', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 401, \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` без токена возвращает статус 401'
+        with django_assert_max_num_queries(20):
+            response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 201, \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` с правильными данными возвращает статус 201'
+        result = response.json()
+        assert [title['name'] for title in result] == [item['name'] for item in data], \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` возвращает произведения в порядке запроса'
+        assert result[0]['id'] == titles[0]['id'] and result[0]['genre'] == [genres[2]] and \
+            result[0]['category'] == categories[1], \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` обновляет произведения с указанным `id`'
+        assert result[1]['genre'] == [genres[1], genres[0]], \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` сохраняет жанры новых произведений'
+        response = client.get('/api/v1/titles/?genre=comedy')
+        assert response.json()['count'] == 30, \
+            'Проверьте, что созданные через `/api/v1/titles/bulk/` произведения видны в списке'
+        response = client.get('/api/v1/titles/?search=обратно')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], \
+            'Проверьте, что `/api/v1/titles/bulk/` обновляет поисковый индекс'
+
+        data = [
+            {'name': 'Новинка', 'genre': [genres[0]['slug']], 'category': categories[0]['slug'],
+             'description': None},
+            {'name': 'Сериал 1', 'genre': ['unknown'], 'category': 'unknown', 'description': None},
+            {'id': 100500, 'name': 'Новинка', 'genre': [], 'description': None},
+            {'name': 'Сериал 2', 'genre': [], 'description': None},
+        ]
+        response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 400, \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` с неправильными данными возвращает статус 400'
+        errors = response.json()
+        assert len(errors) == 4 and list(errors[0]) == ['name'] and set(errors[1]) == {'genre', 'category'} and \
+            set(errors[2]) == {'id', 'name'} and list(errors[3]) == ['name'], \
+            'Проверьте, что `/api/v1/titles/bulk/` возвращает ошибки для каждого произведения'
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 32, \
+            'Проверьте, что `/api/v1/titles/bulk/` ничего не сохраняет, если есть ошибки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_titles_genre_slugs_batched(self, user_client):
+        genres = create_genre(user_client)
+        categories = create_categories(user_client)
+        data = {'name': 'Сборник', 'year': 2000, 'genre': [genre['slug'] for genre in genres],
+                'category': categories[0]['slug'], 'description': 'Всё сразу'}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201, \
+            'Проверьте, что POST запрос `/api/v1/titles/` с несколькими жанрами возвращает статус 201'
+        lookups = [query['sql'] for query in context.captured_queries
+                   if 'WHERE "api_v1_genre"."slug"' in query['sql']]
+        assert len(lookups) == 1, \
+            'Проверьте, что жанры произведения загружаются одним запросом'
+        data['name'] = 'Сборник 2'
+        data['genre'] = [genres[0]['slug'], 'western', 'noir']
+        response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400 and 'western' in str(response.json()['genre']) and \
+            'noir' in str(response.json()['genre']), \
+            'Проверьте, что POST запрос `/api/v1/titles/` сообщает обо всех несуществующих жанрах сразу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_titles_query_budget(self, client, user_client, query_budget, settings):
+        # Budgets cover the view, not the zlib buffers of the file cache.
+        settings.API_CACHE = 'default'
+        titles, categories, genres = create_titles(user_client)
+        for size in (2, 40):
+            for number in range(len(titles), size):
+                data = {'name': f'Выпуск {number}', 'year': 2001, 'genre': [genre['slug'] for genre in genres],
+                        'category': categories[number % 2]['slug'], 'description': 'Серия'}
+                titles.append(user_client.post('/api/v1/titles/', data=data).json())
+            with query_budget('titles-list'):
+                response = client.get('/api/v1/titles/?year=2001')
+            assert response.status_code == 200, \
+                'Проверьте, что при GET запросе `/api/v1/titles/` возвращается статус 200'
+        with query_budget('titles-detail'):
+            response = client.get(f'/api/v1/titles/{titles[-1]["id"]}/')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` возвращается статус 200'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_10_titles_search_version(self, client, user_client, settings, monkeypatch):
+        settings.TITLE_SEARCH_BACKEND = 'python'
+        reset_search_index()
+        refreshes = []
+        refresh = PythonIndex.refresh
+        monkeypatch.setattr(PythonIndex, 'refresh', lambda index: refreshes.append(1) or refresh(index))
+        try:
+            titles, categories, genres = create_titles(user_client)
+            # Distinct queries keep the anonymous response cache out of the way.
+            client.get('/api/v1/titles/?search=поворот')
+            refreshes.clear()
+            user_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/', data={'text': 'Отзыв', 'score': 5})
+            client.get('/api/v1/titles/?search=поворо')
+            assert refreshes == [], \
+                'Проверьте, что изменение рейтинга не перестраивает поисковый индекс'
+            user_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Проект поворот'})
+            response = client.get('/api/v1/titles/?search=повор')
+            assert refreshes == [] and len(response.json()['results']) == 2, \
+                'Проверьте, что процесс, изменивший произведение, обновляет индекс без полной перестройки'
+            caches[settings.TITLE_SEARCH_CACHE].set(VERSION_KEY, 'other-worker', None)
+            client.get('/api/v1/titles/?search=пово')
+            assert refreshes == [1], \
+                'Проверьте, что индекс перестраивается, когда произведения изменены в другом процессе'
+
+            refreshes.clear()
+            with transaction.atomic():
+                seen = caches[settings.TITLE_SEARCH_CACHE].get(VERSION_KEY)
+                Title.objects.get(pk=titles[0]['id']).save()
+                # Another worker publishes its own change before this commit.
+                PythonIndex().publish(seen, False)
+            client.get('/api/v1/titles/?search=пов')
+            assert refreshes == [1], \
+                'Проверьте, что индекс перестраивается, если другой процесс изменил произведения до фиксации'
+        finally:
+            reset_search_index()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_11_titles_bulk_integrity(self, user_client, monkeypatch):
+        titles, categories, genres = create_titles(user_client)
+        data = [{'name': 'Двойник', 'year': 2000, 'genre': [genres[1]['slug'], genres[1]['slug']],
+                 'description': None}]
+        response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 201 and response.json()[0]['genre'] == [genres[1]], \
+            'Проверьте, что `/api/v1/titles/bulk/` сохраняет повторяющийся жанр произведения один раз'
+
+        prefetch = TitleBulkListSerializer.prefetch
+
+        def prefetch_then_race(serializer, items):
+            prefetch(serializer, items)
+            Title.objects.create(name='Новинка')
+
+        monkeypatch.setattr(TitleBulkListSerializer, 'prefetch', prefetch_then_race)
+        data = [{'name': 'Новинка', 'genre': [], 'description': None}]
+        response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 400 and response.json() == {
+            'detail': ['Title names must stay unique']}, \
+            'Проверьте, что `/api/v1/titles/bulk/` сообщает о нарушении уникальности названий'
+
+        def write(*args):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(TitleBulkListSerializer, 'write', write)
+        monkeypatch.setattr(TitleBulkListSerializer, 'prefetch', prefetch)
+        data = [{'name': 'Сиквел', 'genre': [], 'description': None}]
+        with pytest.raises(IntegrityError):
+            user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12_titles_bulk_update_only(self, user_client):
+        titles, categories, genres = create_titles(user_client)
+        data = [{'id': str(titles[0]['id']), 'name': 'Поворот навсегда', 'genre': [genres[0]['slug']],
+                 'description': None}]
+        response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 200, \
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` только с обновлениями возвращает статус 200'
+        assert response.json()[0]['id'] == titles[0]['id'] and response.json()[0]['name'] == 'Поворот навсегда', \
+            'Проверьте, что `/api/v1/titles/bulk/` принимает `id` в виде строки с числом'
@@ -1,5 +1,9 @@
 import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
 
+from api_v1.models import Review, Title, User
+from api_v1.pagination import FeedCursorPagination
 from .common import create_users_api, auth_client, create_titles, create_reviews
 
 
@@ -242,3 +246,118 @@ class Test05ReviewAPI:
             f'Проверьте, что при DELETE запросе `/api/v1/titles/{{title_id}}/reviews/{{review_id}}/` ' \
             f'без токена авторизации возвращается статус 401'
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_stored_rating(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 3.5, \
+            'Проверьте, что после DELETE запроса `/api/v1/titles/{title_id}/reviews/{review_id}/` ' \
+            'сохранённое значение `rating` пересчитывается'
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert response.json()['results'][0]['id'] == titles[0]['id'], \
+            'Проверьте, что GET запрос `/api/v1/titles/` поддерживает сортировку по `rating`'
+
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (7, 2, 3.5), \
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг по отзывам'
+        assert Title.objects.get(pk=titles[1]['id']).rating is None, \
+            'Проверьте, что команда `rebuild_ratings` сбрасывает рейтинг произведений без отзывов'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_review_cursor_pagination(self, client, user_client, admin, monkeypatch):
+        monkeypatch.setattr(FeedCursorPagination, 'page_size', 2)
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/?pagination=cursor` ' \
+            'возвращается статус 200'
+        data = response.json()
+        assert 'count' not in data and data['next'] and 'cursor=' in data['next'], \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/?pagination=cursor` ' \
+            'возвращается курсорная пагинация без параметра `count`'
+        ids = [review['id'] for review in data['results']]
+        data = client.get(data['next']).json()
+        ids += [review['id'] for review in data['results']]
+        assert ids == [review['id'] for review in reversed(reviews)] and data['next'] is None, \
+            'Проверьте, что курсорная пагинация `/api/v1/titles/{title_id}/reviews/` ' \
+            'возвращает все отзывы в порядке `-pub_date`'
+        data = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/').json()
+        assert data['count'] == len(reviews), \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` ' \
+            'по умолчанию сохраняется постраничная пагинация'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_review_unique_constraint(self, user_client, admin, monkeypatch):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = user_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/', data={'text': 'asd', 'score': 2})
+        assert response.status_code == 400 and 'detail' in response.json(), \
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/` ' \
+            'на уже оставленный отзыв возвращается статус 400 с полем `detail`'
+        with pytest.raises(IntegrityError):
+            Review.objects.create(title_id=titles[0]['id'], author=admin, text='asd', score=2)
+        assert Title.objects.get(pk=titles[0]['id']).rating == 4, \
+            'Проверьте, что отклонённый повторный отзыв не меняет `rating`'
+
+        def save(*args, **kwargs):
+            raise IntegrityError('NOT NULL constraint failed: api_v1_review.text')
+
+        monkeypatch.setattr(Review, 'save', save)
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'asd', 'score': 2})
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_review_query_budget(self, client, user_client, admin, query_budget):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        for number in range(20):
+            author = User.objects.create(username=f'critic{number}', email=f'critic{number}@yamdb.fake')
+            auth_client(author).post(f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                                     data={'text': f'Рецензия {number}', 'score': 7})
+        with query_budget('reviews-list'):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        assert len(response.json()['results']) == 23, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` возвращаются все отзывы'
+        with query_budget('reviews-detail'):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/{review_id}/` возвращается статус 200'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_review_stale_writes(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        first = Review.objects.get(pk=reviews[1]['id'])
+        second = Review.objects.get(pk=reviews[1]['id'])
+        first.score = 9
+        first.save()
+        second.score = 2
+        second.save()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (5 + 2 + 4, 3), \
+            'Проверьте, что изменение отзыва по устаревшему экземпляру не искажает сохранённый рейтинг'
+
+        first = Review.objects.get(pk=reviews[1]['id'])
+        second = Review.objects.get(pk=reviews[1]['id'])
+        first.delete()
+        second.delete()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (5 + 4, 2), \
+            'Проверьте, что повторное удаление отзыва не вычитает его оценку дважды'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_10_title_stale_save(self, user_client, admin):
+        titles, _, _ = create_titles(user_client)
+        stale = Title.objects.get(pk=titles[1]['id'])
+        user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'Хорошо', 'score': 7})
+        stale.description = 'Исправленное описание'
+        stale.save()
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (7, 1, 7), \
+            'Проверьте, что сохранение устаревшего экземпляра произведения не затирает его рейтинг'
+        assert title.description == 'Исправленное описание', \
+            'Проверьте, что сохранение произведения записывает остальные поля'
+        response = user_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Новое название'})
+        assert response.status_code == 200 and response.json()['rating'] == 7, \
+            'Проверьте, что PATCH запрос `/api/v1/titles/{title_id}/` не меняет рейтинг произведения'
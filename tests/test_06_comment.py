@@ -1,5 +1,6 @@
 import pytest
 
+from api_v1.models import User
 from .common import auth_client, create_reviews, create_comments
 
 
@@ -201,3 +202,40 @@ class Test06CommentAPI:
             f'Проверьте, что при DELETE запросе `/api/v1/titles/{{title_id}}/reviews/{{review_id}}/comments/{{comment_id}}/` ' \
             f'без токена авторизации возвращается статус 401'
         self.check_permissions(user, 'обычного пользователя', f'{pre_url}{comments[2]["id"]}/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_comment_parent_chain(self, client, user_client, admin, django_assert_max_num_queries):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/')
+        assert response.status_code == 404, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` ' \
+            'для отзыва другого произведения возвращается статус 404'
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/', data={'text': 'qwerty'})
+        assert response.status_code == 404, \
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` ' \
+            'для отзыва другого произведения возвращается статус 404'
+        with django_assert_max_num_queries(3):
+            response = user_client.post(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/', data={'text': 'qwerty'})
+        assert response.status_code == 201, \
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` ' \
+            'с правильными данными возвращается статус 201'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_comment_query_budget(self, client, user_client, admin, query_budget):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        for number in range(20):
+            author = User.objects.create(username=f'reader{number}', email=f'reader{number}@yamdb.fake')
+            auth_client(author).post(url, data={'text': f'Комментарий {number}'})
+        with query_budget('comments-list'):
+            response = client.get(url)
+        assert len(response.json()['results']) == 23, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` ' \
+            'возвращаются все комментарии'
+        with query_budget('comments-detail'):
+            response = client.get(f'{url}{comments[0]["id"]}/')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comment_id}/` ' \
+            'возвращается статус 200'
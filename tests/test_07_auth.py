@@ -0,0 +1,156 @@
+import os
+import re
+
+import pytest
+from django.core.mail import EmailMessage
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from api_v1.confirmation import issue_code
+from api_v1.mail import claim_outbox
+from api_v1.models import ConfirmationCode, OutboxEmail, User
+from api_v1.throttling import AuthEmailThrottle, AuthIPThrottle
+
+
+class Test07AuthAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_register_outbox(self, client, settings, tmp_path):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        response = client.post('/api/v1/auth/email/', data={'email': 'newuser@yamdb.fake'})
+        assert response.status_code == 201, \
+            'Проверьте, что при POST запросе `/api/v1/auth/email/` с правильными данными возвращается статус 201'
+        assert OutboxEmail.objects.filter(recipients='newuser@yamdb.fake', sent__isnull=True).count() == 1, \
+            'Проверьте, что при POST запросе `/api/v1/auth/email/` письмо записывается в очередь'
+        assert os.listdir(tmp_path) == [], \
+            'Проверьте, что при POST запросе `/api/v1/auth/email/` письмо не отправляется синхронно'
+
+        call_command('send_outbox')
+        assert len(os.listdir(tmp_path)) == 1, \
+            'Проверьте, что команда `send_outbox` отправляет письма из очереди'
+        assert not OutboxEmail.objects.filter(sent__isnull=True).exists(), \
+            'Проверьте, что команда `send_outbox` отмечает отправленные письма'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_outbox_retry(self, monkeypatch):
+        def send(message):
+            raise ConnectionError('SMTP is down')
+
+        monkeypatch.setattr(EmailMessage, 'send', send)
+        OutboxEmail.objects.create(subject='s', body='b', from_email='a@yamdb.fake', recipients='b@yamdb.fake')
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.sent is None and email.attempts == 1 and email.last_error, \
+            'Проверьте, что команда `send_outbox` сохраняет ошибку отправки и увеличивает счётчик попыток'
+        assert email.next_attempt > email.created, \
+            'Проверьте, что команда `send_outbox` откладывает повторную отправку'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_confirmation_code_token(self, client):
+        client.post('/api/v1/auth/email/', data={'email': 'newuser@yamdb.fake'})
+        code = re.search(r'code "([^"]+)"', OutboxEmail.objects.get().body).group(1)
+        response = client.post('/api/v1/auth/token/', data={'email': 'newuser@yamdb.fake',
+                                                            'confirmation_code': 'wrong'})
+        assert response.status_code == 400, \
+            'Проверьте, что при POST запросе `/api/v1/auth/token/` с неверным кодом возвращается статус 400'
+        response = client.post('/api/v1/auth/token/', data={'email': 'other@yamdb.fake',
+                                                            'confirmation_code': code})
+        assert response.status_code == 400, \
+            'Проверьте, что при POST запросе `/api/v1/auth/token/` код другого пользователя не подходит'
+        response = client.post('/api/v1/auth/token/', data={'email': 'newuser@yamdb.fake',
+                                                            'confirmation_code': code})
+        assert response.status_code == 200 and response.json().get('token'), \
+            'Проверьте, что при POST запросе `/api/v1/auth/token/` с кодом из письма возвращается `token`'
+        response = client.post('/api/v1/auth/token/', data={'email': 'newuser@yamdb.fake',
+                                                            'confirmation_code': code})
+        assert response.status_code == 400, \
+            'Проверьте, что код подтверждения можно использовать только один раз'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_confirmation_code_expired(self, client, admin):
+        code = issue_code(admin)
+        ConfirmationCode.objects.update(expires=timezone.now())
+        response = client.post('/api/v1/auth/token/', data={'email': admin.email, 'confirmation_code': code})
+        assert response.status_code == 400, \
+            'Проверьте, что при POST запросе `/api/v1/auth/token/` с просроченным кодом возвращается статус 400'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_auth_throttling(self, client, monkeypatch):
+        monkeypatch.setattr(AuthEmailThrottle, 'rate', '2/min', raising=False)
+        data = {'email': 'admin@yamdb.fake', 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            response = client.post('/api/v1/auth/token/', data=data)
+            assert response.status_code == 400, \
+                'Проверьте, что при POST запросе `/api/v1/auth/token/` с неверным кодом возвращается статус 400'
+        response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 429, \
+            'Проверьте, что повторные запросы `/api/v1/auth/token/` с одним email ограничиваются статусом 429'
+        response = client.post('/api/v1/auth/token/', data={**data, 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400, \
+            'Проверьте, что ограничение `/api/v1/auth/token/` учитывается отдельно для каждого email'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_outbox_connection_failure(self, settings, monkeypatch):
+        def open_connection(backend):
+            raise OSError('Connection refused')
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        monkeypatch.setattr(SMTPBackend, 'open', open_connection)
+        for recipient in ('b@yamdb.fake', 'c@yamdb.fake'):
+            OutboxEmail.objects.create(subject='s', body='b', from_email='a@yamdb.fake', recipients=recipient)
+        call_command('send_outbox')
+        assert all(email.sent is None and email.attempts == 1 and 'Connection refused' in email.last_error
+                   for email in OutboxEmail.objects.all()), \
+            'Проверьте, что при недоступном SMTP сервере команда `send_outbox` записывает неудачную попытку ' \
+            'для всех писем пачки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_outbox_claim(self):
+        OutboxEmail.objects.create(subject='s', body='b', from_email='a@yamdb.fake', recipients='b@yamdb.fake')
+        now = timezone.now()
+        assert len(claim_outbox(10, 5, now)) == 1 and claim_outbox(10, 5, now) == [], \
+            'Проверьте, что письмо из очереди забирает только один обработчик'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_auth_throttling_forwarded_for(self, client, monkeypatch):
+        monkeypatch.setattr(AuthIPThrottle, 'rate', '2/min', raising=False)
+        for number in range(2):
+            response = client.post('/api/v1/auth/token/',
+                                   data={'email': f'user{number}@yamdb.fake', 'confirmation_code': 'wrong'},
+                                   HTTP_X_FORWARDED_FOR=f'10.0.0.{number}')
+            assert response.status_code == 400, \
+                'Проверьте, что при POST запросе `/api/v1/auth/token/` с неверным кодом возвращается статус 400'
+        response = client.post('/api/v1/auth/token/',
+                               data={'email': 'user2@yamdb.fake', 'confirmation_code': 'wrong'},
+                               HTTP_X_FORWARDED_FOR='10.0.0.2')
+        assert response.status_code == 429, \
+            'Проверьте, что подмена заголовка `X-Forwarded-For` не сбрасывает ограничение по IP'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_auth_list_body(self, client):
+        for url in ('/api/v1/auth/email/', '/api/v1/auth/token/'):
+            response = client.post(url, data=[], content_type='application/json')
+            assert response.status_code == 400, \
+                f'Проверьте, что POST запрос `{url}` со списком вместо объекта возвращает статус 400'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_10_confirmation_code_reissue(self, client):
+        client.post('/api/v1/auth/email/', data={'email': 'newuser@yamdb.fake'})
+        expired = re.search(r'code "([^"]+)"', OutboxEmail.objects.get().body).group(1)
+        ConfirmationCode.objects.update(expires=timezone.now())
+        response = client.post('/api/v1/auth/email/', data={'email': 'newuser@yamdb.fake'})
+        assert response.status_code == 201, \
+            'Проверьте, что POST запрос `/api/v1/auth/email/` для существующего email выдаёт новый код'
+        assert OutboxEmail.objects.count() == 2 and User.objects.filter(email='newuser@yamdb.fake').count() == 1, \
+            'Проверьте, что повторный запрос `/api/v1/auth/email/` отправляет письмо, не создавая пользователя'
+        code = re.search(r'code "([^"]+)"', OutboxEmail.objects.order_by('pk').last().body).group(1)
+        response = client.post('/api/v1/auth/token/', data={'email': 'newuser@yamdb.fake',
+                                                            'confirmation_code': expired})
+        assert response.status_code == 400, \
+            'Проверьте, что просроченный код не действует после выдачи нового'
+        response = client.post('/api/v1/auth/token/', data={'email': 'newuser@yamdb.fake',
+                                                            'confirmation_code': code})
+        assert response.status_code == 200 and response.json().get('token'), \
+            'Проверьте, что новый код из письма обменивается на `token`'
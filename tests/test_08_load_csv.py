@@ -0,0 +1,30 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Avg
+
+from api_v1.models import Comment, Review, Title
+
+
+class Test08LoadCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_csv(self, client):
+        call_command('load_csv', batch_size=10)
+        assert Title.objects.count() == 31 and Review.objects.count() == 71 and Comment.objects.count() == 5, \
+            'Проверьте, что команда `load_csv` загружает данные из `data/`'
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019 and review.author.username == 'bingobongo', \
+            'Проверьте, что команда `load_csv` сохраняет `pub_date` и `author` из файла'
+        title = Title.objects.get(pk=1)
+        assert title.genre.exists() and title.rating == title.reviews.aggregate(rating=Avg('score'))['rating'], \
+            'Проверьте, что команда `load_csv` заполняет жанры и пересчитывает `rating`'
+        response = client.get('/api/v1/titles/1/')
+        assert response.status_code == 200 and response.json()['category']['slug'] == 'movie', \
+            'Проверьте, что загруженные произведения доступны через `/api/v1/titles/{title_id}/`'
+
+        Title.objects.filter(pk=1).update(name='Изменено')
+        call_command('load_csv', upsert=True)
+        assert Title.objects.count() == 31 and Review.objects.count() == 71, \
+            'Проверьте, что повторный запуск `load_csv` не создаёт дубликаты'
+        assert Title.objects.get(pk=1).name == 'Побег из Шоушенка', \
+            'Проверьте, что `load_csv --upsert` обновляет существующие записи'
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+import pytest
+
+from api_v1.models import Review
+from .common import auth_client, create_comments
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class Test09ExportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_permissions(self, client, user_client, admin):
+        _, _, _, user, _ = create_comments(user_client, admin)
+        response = client.get('/api/v1/export/titles/')
+        assert response.status_code == 401, \
+            'Проверьте, что при GET запросе `/api/v1/export/titles/` без токена возвращается статус 401'
+        response = auth_client(user).get('/api/v1/export/titles/')
+        assert response.status_code == 403, \
+            'Проверьте, что при GET запросе `/api/v1/export/titles/` от пользователя возвращается статус 403'
+        response = user_client.get('/api/v1/export/users/')
+        assert response.status_code == 404, \
+            'Проверьте, что при GET запросе `/api/v1/export/{resource}/` с неизвестным ресурсом ' \
+            'возвращается статус 404'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_titles(self, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        response = user_client.get('/api/v1/export/titles/')
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert response.status_code == 200 and len(rows) == len(titles), \
+            'Проверьте, что `/api/v1/export/titles/` возвращает все произведения в формате NDJSON'
+        assert rows[0]['genre'] == titles[0]['genre'] and rows[0]['category'] == titles[0]['category'], \
+            'Проверьте, что `/api/v1/export/titles/` возвращает жанры и категорию произведения'
+        assert rows[0]['rating'] == 4, \
+            'Проверьте, что `/api/v1/export/titles/` возвращает рейтинг произведения'
+        response = user_client.get('/api/v1/export/titles/?output=csv')
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert rows[1]['name'] == titles[1]['name'], \
+            'Проверьте, что `/api/v1/export/titles/?output=csv` возвращает данные в формате CSV'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_since(self, user_client, admin):
+        comments, reviews, _, _, _ = create_comments(user_client, admin)
+        response = user_client.get('/api/v1/export/reviews/')
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [review['id'] for review in reviews], \
+            'Проверьте, что `/api/v1/export/reviews/` возвращает отзывы в порядке `pub_date`'
+        since = Review.objects.get(pk=reviews[0]['id']).pub_date.isoformat()
+        response = user_client.get('/api/v1/export/reviews/', {'since': since, 'since_id': reviews[0]['id']})
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [review['id'] for review in reviews[1:]], \
+            'Проверьте, что `/api/v1/export/reviews/?since=&since_id=` возвращает только отзывы после курсора'
+        Review.objects.update(pub_date=Review.objects.get(pk=reviews[0]['id']).pub_date)
+        response = user_client.get('/api/v1/export/reviews/', {'since': since, 'since_id': reviews[0]['id']})
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [review['id'] for review in reviews[1:]], \
+            'Проверьте, что отзывы с той же `pub_date`, что и у курсора, не пропускаются'
+        response = user_client.get('/api/v1/export/reviews/', {'since': since})
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert len(rows) == len(reviews), \
+            'Проверьте, что `/api/v1/export/reviews/?since=` без `since_id` повторяет отзывы с той же `pub_date`'
+        response = user_client.get('/api/v1/export/reviews/', {'since': since, 'since_id': 'last'})
+        assert response.status_code == 400, \
+            'Проверьте, что `/api/v1/export/reviews/` с неверным `since_id` возвращает статус 400'
+        response = user_client.get('/api/v1/export/comments/', {'since': 'yesterday'})
+        assert response.status_code == 400, \
+            'Проверьте, что `/api/v1/export/comments/` с неверным `since` возвращает статус 400'
+        response = user_client.get('/api/v1/export/comments/')
+        assert len(read_stream(response).splitlines()) == len(comments), \
+            'Проверьте, что `/api/v1/export/comments/` возвращает все комментарии'
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.mixins import RetrieveModelMixin
+
+from api_v1.caching import evict_object
+from .common import create_reviews, create_titles
+
+
+class Test10CacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cached(self, client, user_client, django_assert_num_queries):
+        titles, _, _ = create_titles(user_client)
+        first = client.get('/api/v1/titles/?year=2000&genre=horror').json()
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/titles/?genre=horror&year=2000')
+        assert response.json() == first, \
+            'Проверьте, что анонимный GET запрос `/api/v1/titles/` повторно отдаётся из кеша ' \
+            'независимо от порядка параметров'
+        data = {'name': 'Новое', 'year': 2000, 'genre': ['horror'], 'category': 'films'}
+        user_client.post('/api/v1/titles/', data=data)
+        response = client.get('/api/v1/titles/?year=2000&genre=horror')
+        assert len(response.json()['results']) == 2, \
+            'Проверьте, что после создания произведения кеш списков `/api/v1/titles/` сбрасывается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_evicts_title(self, client, user_client, admin, django_assert_num_queries):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        client.get('/api/v1/categories/')
+        user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'a', 'score': 10})
+        with django_assert_num_queries(0):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+            client.get('/api/v1/categories/')
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json()['rating'] == 10, \
+            'Проверьте, что новый отзыв сбрасывает кеш только своего произведения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_evicts_every_page(self, client, user_client, admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        urls = ('/api/v1/titles/', '/api/v1/titles/?year=2020', f'/api/v1/titles/{titles[1]["id"]}/')
+        for url in urls:
+            client.get(url)
+        user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'a', 'score': 10})
+        for url in urls:
+            data = client.get(url).json()
+            rating = [item['rating'] for item in data.get('results', [data]) if item['id'] == titles[1]['id']]
+            assert rating == [10], \
+                f'Проверьте, что новый отзыв сбрасывает кеш всех страниц `{url}` с этим произведением'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_eviction_during_render(self, client, user_client, monkeypatch, django_assert_num_queries):
+        titles, _, _ = create_titles(user_client)
+        retrieve = RetrieveModelMixin.retrieve
+
+        def retrieve_then_evict(view, request, *args, **kwargs):
+            response = retrieve(view, request, *args, **kwargs)
+            evict_object('titles', titles[0]['id'])
+            return response
+
+        monkeypatch.setattr(RetrieveModelMixin, 'retrieve', retrieve_then_evict)
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        monkeypatch.setattr(RetrieveModelMixin, 'retrieve', retrieve)
+        with CaptureQueriesContext(connection) as context:
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert context.captured_queries, \
+            'Проверьте, что ответ, отрисованный во время изменения произведения, не сохраняется в кеш'
+        with django_assert_num_queries(0):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert caches[settings.API_CACHE] is caches['shared'], \
+            'Проверьте, что кеш ответов общий для всех процессов'
+
+    def test_05_shared_cache_isolated(self):
+        location = os.path.join(settings.BASE_DIR, '.cache', 'shared')
+        assert caches['shared']._dir != os.path.abspath(location), \
+            'Проверьте, что тесты не очищают общий кеш развёрнутого приложения'
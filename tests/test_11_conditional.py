@@ -0,0 +1,65 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test11ConditionalAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_etag(self, client, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = user_client.get(url)
+        etag = response['ETag']
+        assert response.has_header('Last-Modified'), \
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/` возвращает заголовки `ETag` и `Last-Modified`'
+        for current in (client, user_client):
+            response = current.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, \
+                'Проверьте, что GET запрос `/api/v1/titles/{title_id}/` с актуальным `If-None-Match` ' \
+                'возвращает статус 304'
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304, \
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/` с актуальным `If-Modified-Since` ' \
+            'возвращает статус 304'
+        user_client.patch(f'{url}reviews/{reviews[0]["id"]}/', data={'score': 1})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response.json()['rating'] == 8 / 3, \
+            'Проверьте, что после изменения отзыва GET запрос `/api/v1/titles/{title_id}/` ' \
+            'возвращает новые данные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_feed_etag(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        for url in (f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                    f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/',
+                    '/api/v1/titles/?genre=horror', '/api/v1/genres/'):
+            etag = client.get(url)['ETag']
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, \
+                f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` возвращает статус 304'
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        etag = client.get(url)['ETag']
+        user_client.patch(f'{url}{comments[0]["id"]}/', data={'text': 'new'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, \
+            'Проверьте, что после изменения комментария GET запрос комментариев возвращает новые данные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_delete_if_modified_since(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        comments_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        for url, deleted in ((comments_url, f'{comments_url}{comments[0]["id"]}/'),
+                             ('/api/v1/titles/', f'/api/v1/titles/{titles[1]["id"]}/')):
+            response = client.get(url)
+            since = response.get('Last-Modified', 'Sat, 01 Jan 2000 00:00:00 GMT')
+            count = response.json()['count']
+            user_client.delete(deleted)
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            assert response.status_code == 200 and response.json()['count'] == count - 1, \
+                f'Проверьте, что после удаления GET запрос `{url}` только с `If-Modified-Since` ' \
+                'возвращает новые данные'
+        response = client.get(f'{comments_url}{comments[0]["id"]}/',
+                              HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2100 00:00:00 GMT')
+        assert response.status_code == 404, \
+            'Проверьте, что GET запрос удалённого комментария с `If-Modified-Since` возвращает статус 404'
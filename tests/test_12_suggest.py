@@ -0,0 +1,41 @@
+import pytest
+
+from api_v1.suggest import build_suggest_indexes, reset_suggest_indexes
+from .common import create_titles
+
+
+class Test12SuggestAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_suggest(self, client, user_client, django_assert_num_queries):
+        titles, categories, genres = create_titles(user_client)
+        reset_suggest_indexes()
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/suggest/?q=по')
+        assert response.json()['titles'] == [], \
+            'Проверьте, что `/api/v1/suggest/` не загружает индексы из БД во время запроса'
+        build_suggest_indexes()
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/suggest/?q=по')
+        assert response.status_code == 200, \
+            'Проверьте, что GET запрос `/api/v1/suggest/` доступен без токена'
+        data = response.json()
+        assert data['titles'] == [{'id': titles[0]['id'], 'name': 'Поворот туда'}], \
+            'Проверьте, что `/api/v1/suggest/?q=` подсказывает произведения по началу названия'
+        assert data['genres'] == [] and data['categories'] == [], \
+            'Проверьте, что `/api/v1/suggest/?q=` не подсказывает лишние жанры и категории'
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/suggest/?q=ТУД&type=titles')
+        assert [title['name'] for title in response.json()['titles']] == ['Поворот туда'], \
+            'Проверьте, что `/api/v1/suggest/` ищет по началу любого слова без учёта регистра и без запросов к БД'
+
+        user_client.post('/api/v1/genres/', data={'name': 'Документальный', 'slug': 'doc'})
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/suggest/?q=д&type=genres,titles&limit=1')
+        data = response.json()
+        assert data == {'genres': [{'id': data['genres'][0]['id'], 'name': 'Документальный', 'slug': 'doc'}],
+                        'titles': []}, \
+            'Проверьте, что индексы `/api/v1/suggest/` обновляются при изменении данных и учитывают `limit`'
+        response = client.get('/api/v1/suggest/?q=д&type=users')
+        assert response.status_code == 400, \
+            'Проверьте, что `/api/v1/suggest/` с неизвестным `type` возвращает статус 400'
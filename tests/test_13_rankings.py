@@ -0,0 +1,80 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+
+from api_v1.models import TitleRanking
+from api_v1.rankings import MEAN_KEY
+from .common import create_reviews
+
+
+class Test13RankingsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rankings(self, client, user_client, admin, django_assert_num_queries):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+                                    data={'text': 'Неплохо', 'score': 6})
+        review_id = response.json()['id']
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/rankings/')
+        assert response.status_code == 200, \
+            'Проверьте, что GET запрос `/api/v1/rankings/` доступен без токена'
+        data = response.json()
+        assert 'results' in data and 'next' in data, \
+            'Проверьте, что `/api/v1/rankings/` возвращает данные с пагинацией'
+        assert [(item['title']['id'], item['rating'], item['votes']) for item in data['results']] == [
+            (titles[1]['id'], 6, 1), (titles[0]['id'], 4, 3)], \
+            'Проверьте, что `/api/v1/rankings/` сортирует произведения по средней оценке'
+        assert data['results'][0]['title']['genre'] == [{'name': 'Драма', 'slug': 'drama'}], \
+            'Проверьте, что `/api/v1/rankings/` возвращает произведения с жанрами и категорией'
+
+        response = client.get('/api/v1/rankings/trending/')
+        assert [item['title']['id'] for item in response.json()['results']] == [
+            titles[0]['id'], titles[1]['id']], \
+            'Проверьте, что `/api/v1/rankings/trending/` сортирует произведения по числу свежих отзывов'
+        response = client.get('/api/v1/rankings/genres/drama/')
+        assert [item['title']['id'] for item in response.json()['results']] == [titles[1]['id']], \
+            'Проверьте, что `/api/v1/rankings/genres/{slug}/` возвращает только произведения жанра'
+        response = client.get('/api/v1/rankings/categories/films/')
+        assert [item['title']['id'] for item in response.json()['results']] == [titles[0]['id']], \
+            'Проверьте, что `/api/v1/rankings/categories/{slug}/` возвращает только произведения категории'
+        response = client.get('/api/v1/rankings/genres/unknown/')
+        assert response.status_code == 404, \
+            'Проверьте, что `/api/v1/rankings/genres/{slug}/` для несуществующего жанра возвращает статус 404'
+        response = client.get('/api/v1/rankings/?method=median')
+        assert response.status_code == 400, \
+            'Проверьте, что `/api/v1/rankings/` с неизвестным `method` возвращает статус 400'
+
+        call_command('rebuild_rankings')
+        response = client.get('/api/v1/rankings/?method=bayesian')
+        mean, prior = 18 / 4, settings.RANKING_PRIOR_VOTES
+        expected = [(titles[1]['id'], (6 + prior * mean) / (1 + prior)),
+                    (titles[0]['id'], (12 + prior * mean) / (3 + prior))]
+        assert [(item['title']['id'], pytest.approx(item['bayesian'])) for item in response.json()['results']] == \
+            expected, \
+            'Проверьте, что `/api/v1/rankings/?method=bayesian` сортирует по байесовской оценке'
+
+        user_client.delete(f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/')
+        response = client.get('/api/v1/rankings/')
+        assert [item['title']['id'] for item in response.json()['results']] == [titles[0]['id']], \
+            'Проверьте, что рейтинги обновляются при удалении отзыва'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rankings_shared_mean(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        call_command('rebuild_rankings')
+        assert caches[settings.RANKING_CACHE].get(MEAN_KEY) == 4, \
+            'Проверьте, что средняя оценка последней пересборки рейтингов хранится в общем кэше'
+
+        caches[settings.RANKING_CACHE].set(MEAN_KEY, 10, None)
+        user_client.patch(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+                          data={'score': 8})
+        response = client.get('/api/v1/rankings/?method=bayesian')
+        prior = settings.RANKING_PRIOR_VOTES
+        assert [pytest.approx(item['bayesian']) for item in response.json()['results']] == [
+            (15 + prior * 10) / (3 + prior)], \
+            'Проверьте, что обновление рейтинга произведения использует среднюю оценку из общего кэша'
+        assert TitleRanking.objects.filter(title_id=titles[0]['id'], scope='all').count() == 1, \
+            'Проверьте, что обновление рейтинга заменяет строки произведения'
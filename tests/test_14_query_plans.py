@@ -0,0 +1,53 @@
+import pytest
+from django.db.models import Exists, OuterRef
+
+from api_v1.models import Title
+from .common import create_comments
+
+
+class Test14QueryPlanAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_endpoints_use_indexes(self, client, user_client, admin, assert_indexed_plans):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        # `?name=` is a substring match and scans by design, `?search=` is
+        # its indexed counterpart.
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=horror',
+            '/api/v1/titles/?category=films',
+            '/api/v1/titles/?year=2000',
+            '/api/v1/titles/?genre=horror&category=films&year=2000',
+            '/api/v1/titles/?ordering=year',
+            '/api/v1/titles/?ordering=-rating',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/?pagination=cursor',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/rankings/',
+            '/api/v1/rankings/?method=bayesian',
+            '/api/v1/rankings/trending/',
+            '/api/v1/rankings/genres/horror/',
+            '/api/v1/rankings/categories/films/',
+        )
+        for url in urls:
+            with assert_indexed_plans():
+                response = client.get(url)
+            assert response.status_code == 200, \
+                f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_auditor_reports_scans(self, assert_indexed_plans):
+        with pytest.raises(AssertionError, match='full table scan'):
+            with assert_indexed_plans():
+                list(Title.objects.filter(description='Крутое пике'))
+        with pytest.raises(AssertionError, match='temp B-tree sort'):
+            with assert_indexed_plans():
+                list(Title.objects.order_by('description'))
+        with pytest.raises(AssertionError, match='full index scan'):
+            with assert_indexed_plans():
+                list(Title.objects.filter(Exists(Title.genre.through.objects.filter(
+                    title=OuterRef('pk'), genre_id=1))).order_by('name')[:10])
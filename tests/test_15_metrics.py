@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+
+from api_v1.instrumentation import REGISTRY
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test15MetricsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics_permissions(self, client, user_client):
+        user, moderator = create_users_api(user_client)
+        for url in ('/api/v1/metrics/', '/api/v1/metrics/prometheus/'):
+            response = client.get(url)
+            assert response.status_code == 401, \
+                f'Проверьте, что GET запрос `{url}` без токена возвращает статус 401'
+            response = auth_client(moderator).get(url)
+            assert response.status_code == 403, \
+                f'Проверьте, что GET запрос `{url}` доступен только администратору'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_metrics(self, client, user_client, settings, caplog):
+        create_titles(user_client)
+        REGISTRY.reset()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = user_client.get('/api/v1/metrics/')
+        assert response.status_code == 200, \
+            'Проверьте, что GET запрос `/api/v1/metrics/` администратором возвращает статус 200'
+        endpoints = {(item['endpoint'], item['method']): item for item in response.json()['endpoints']}
+        titles = endpoints.get(('titles-list', 'GET'))
+        assert titles is not None and titles['duration']['count'] == 2, \
+            'Проверьте, что `/api/v1/metrics/` считает запросы по имени URL и методу'
+        assert titles['queries']['sum'] >= 2 and titles['size']['sum'] > 0 and \
+            titles['render_time']['sum'] > 0 and titles['duration']['buckets']['+Inf'] == 2, \
+            'Проверьте, что `/api/v1/metrics/` собирает число запросов к БД, время отрисовки и размер ответа'
+
+        response = user_client.get('/api/v1/metrics/prometheus/')
+        assert response['Content-Type'].startswith('text/plain'), \
+            'Проверьте, что `/api/v1/metrics/prometheus/` возвращает метрики в текстовом формате Prometheus'
+        text = response.content.decode()
+        assert '# TYPE api_request_duration_seconds histogram' in text and \
+            'api_request_queries_count{endpoint="titles-list",method="GET"} 2' in text, \
+            'Проверьте, что `/api/v1/metrics/prometheus/` возвращает гистограммы по эндпоинтам'
+
+        settings.API_SLOW_REQUEST_SECONDS = 0
+        with caplog.at_level(logging.WARNING, logger='api_v1.instrumentation'):
+            client.get('/api/v1/genres/')
+        assert 'Slow request GET genres-list' in caplog.text and 'api_v1_genre' in caplog.text, \
+            'Проверьте, что медленные запросы логируются вместе с самыми долгими SQL запросами'
+        slow = user_client.get('/api/v1/metrics/').json()['slow_requests']
+        assert any(item['endpoint'] == 'genres-list' and item['statements'] for item in slow), \
+            'Проверьте, что `/api/v1/metrics/` показывает медленные запросы с их SQL'
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_03_metrics_labels(self, client, user_client, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        REGISTRY.reset()
+        client.get('/api/v1/genres/')
+        client.generic('PROPFIND', '/api/v1/genres/')
+        settings.API_METRICS_MAX_ENDPOINTS = 2
+        client.get('/api/v1/categories/')
+        endpoints = {(item['endpoint'], item['method']): item for item in user_client.get(
+            '/api/v1/metrics/').json()['endpoints']}
+        assert endpoints[('genres-list', 'GET')]['queries']['sum'] > 0, \
+            'Проверьте, что `/api/v1/metrics/` считает запросы ко всем базам данных, включая реплики'
+        assert ('genres-list', 'OTHER') in endpoints and ('genres-list', 'PROPFIND') not in endpoints, \
+            'Проверьте, что `/api/v1/metrics/` объединяет неизвестные HTTP методы в метку `OTHER`'
+        assert ('<other>', 'GET') in endpoints and ('categories-list', 'GET') not in endpoints, \
+            'Проверьте, что `/api/v1/metrics/` ограничивает число эндпоинтов настройкой `API_METRICS_MAX_ENDPOINTS`'
@@ -0,0 +1,58 @@
+import asyncio
+import copy
+import json
+
+import pytest
+
+from api_v1.asgi import ThreadPoolASGIHandler
+from api_v1.benchmark import (
+    asgi_request, compare, get_headers, get_scenarios, run_client, run_interfaces, seed, uncovered_routes)
+
+
+class Test16BenchmarkAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_benchmark(self):
+        scale = {'users': 3, 'genres': 2, 'categories': 2, 'titles': 4, 'reviews': 2, 'comments': 1}
+        data = seed(scale)
+        scenarios = get_scenarios(data)
+        assert uncovered_routes(scenarios) == [], \
+            'Проверьте, что бенчмарк запрашивает каждый GET маршрут из `api_v1/urls.py`'
+        results = run_client(scenarios, data, iterations=2)
+        assert set(results) == set(scenarios) and all(
+            result['p50'] <= result['p95'] <= result['p99'] and result['queries'] >= 0
+            for result in results.values()), \
+            'Проверьте, что бенчмарк считает перцентили задержки и число запросов к БД'
+
+        baseline = {'meta': {'scale': scale}, 'client': results}
+        assert compare(baseline, copy.deepcopy(baseline), 0.2) == [], \
+            'Проверьте, что одинаковые прогоны бенчмарка не считаются регрессией'
+        current = copy.deepcopy(baseline)
+        current['client']['titles-list']['queries'] += 1
+        current['client']['genres-list']['p95'] *= 2
+        problems = compare(baseline, current, 0.2)
+        assert len(problems) == 2 and problems[0].startswith('genres-list') and \
+            problems[1].startswith('titles-list'), \
+            'Проверьте, что бенчмарк находит рост числа запросов и задержки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_asgi(self):
+        scale = {'users': 3, 'genres': 2, 'categories': 2, 'titles': 4, 'reviews': 2, 'comments': 1}
+        data = seed(scale)
+        application = ThreadPoolASGIHandler()
+        status, body = asyncio.run(asgi_request(application, '/api/v1/genres/'))
+        assert status == 200 and len(json.loads(body)['results']) == 2, \
+            'Проверьте, что ASGI приложение отвечает на GET запросы'
+        status, body = asyncio.run(asgi_request(
+            application, '/api/v1/export/titles/', headers=get_headers('admin', data)))
+        assert status == 200 and len(body.decode().splitlines()) == 4, \
+            'Проверьте, что ASGI приложение отдаёт потоковые ответы целиком'
+        application.executor.shutdown()
+
+        scenarios = get_scenarios(data)
+        results = run_interfaces(
+            {name: scenarios[name] for name in ('genres-list', 'titles-detail', 'export')},
+            data, clients=4, requests_per_client=3)
+        assert set(results) == {'wsgi', 'asgi'} and all(
+            result['requests'] == 12 and result['throughput'] > 0 for result in results.values()), \
+            'Проверьте, что бенчмарк сравнивает пропускную способность WSGI и ASGI'
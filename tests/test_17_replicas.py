@@ -0,0 +1,59 @@
+import pytest
+from django.core.cache import caches
+from django.db import connections
+
+from api_v1.routing import PRIMARY_COOKIE, get_pin_key
+from .common import auth_client, create_reviews
+
+
+def replicate():
+    connections['default'].ensure_connection()
+    connections['replica'].ensure_connection()
+    connections['default'].connection.backup(connections['replica'].connection)
+
+
+def result_ids(response):
+    return [item['id'] for item in response.json()['results']]
+
+
+class Test17ReplicasAPI:
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_01_replica_reads(self, client, user_client, admin, settings, django_user_model):
+        settings.DATABASE_REPLICAS = ['replica']
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        replicate()
+        pins = caches[settings.DATABASE_PRIMARY_PIN_CACHE]
+        pins.clear()
+
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        author = auth_client(user)
+        response = author.post(url, data={'text': 'Свежий отзыв', 'score': 7})
+        assert response.status_code == 201 and PRIMARY_COOKIE in response.cookies, \
+            'Проверьте, что после записи клиент получает cookie для чтения с основной базы'
+        review_id = response.json()['id']
+        assert review_id not in result_ids(client.get(url)), \
+            'Проверьте, что безопасные запросы к отзывам читают реплику'
+        assert review_id in result_ids(author.get(url)), \
+            'Проверьте, что автор записи по cookie читает основную базу и видит свой отзыв'
+        assert review_id in result_ids(auth_client(user).get(url)), \
+            'Проверьте, что автор записи без cookie тоже читает основную базу'
+        assert pins.get(get_pin_key(user.id)) and pins is not caches['default'], \
+            'Проверьте, что привязка к основной базе хранится в общем для всех процессов кэше'
+
+        pins.clear()
+        assert review_id not in result_ids(auth_client(user).get(url)), \
+            'Проверьте, что после окончания окна привязки пользователь снова читает реплику'
+        newcomer = django_user_model.objects.create_user(username='newcomer', email='newcomer@yamdb.fake')
+        response = auth_client(newcomer).get(url)
+        assert response.status_code == 200, \
+            'Проверьте, что аутентификация читает пользователей с основной базы'
+
+        replicate()
+        assert review_id in result_ids(client.get(url)), \
+            'Проверьте, что после репликации отзыв виден всем'
+
+        user_client.post('/api/v1/genres/', data={'name': 'Нуар', 'slug': 'noir'})
+        response = client.get('/api/v1/genres/')
+        assert 'noir' in [item['slug'] for item in response.json()['results']], \
+            'Проверьте, что кэш анонимных ответов заполняется с основной базы, а не с отстающей реплики'
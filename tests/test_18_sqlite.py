@@ -0,0 +1,47 @@
+import io
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from api_v1.sqlite import get_pragmas, get_status
+
+
+class Test18SQLiteAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_pragmas(self, settings, tmp_path):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA temp_store')
+            temp_store = cursor.fetchone()[0]
+        assert (busy_timeout, temp_store) == (5000, 2), \
+            'Проверьте, что прагмы из `SQLITE_PRAGMAS` применяются к каждому новому соединению'
+
+        wrapper = DatabaseWrapper(dict(connection.settings_dict, NAME=str(tmp_path / 'tuned.sqlite3')), alias='tuned')
+        try:
+            wrapper.ensure_connection()
+            with wrapper.cursor() as cursor:
+                cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+                cursor.execute('INSERT INTO item DEFAULT VALUES')
+            status = get_status(wrapper, 'truncate')
+        finally:
+            wrapper.close()
+        assert status['pragmas']['journal_mode'] == 'wal' and status['pragmas']['synchronous'] == 'normal', \
+            'Проверьте, что файловая база SQLite работает в режиме WAL с `synchronous=NORMAL`'
+        assert status['checkpoint']['busy'] is False and status['checkpoint']['wal_bytes'] == 0, \
+            'Проверьте, что статус показывает результат контрольной точки WAL'
+
+        out = io.StringIO()
+        call_command('sqlite_status', stdout=out)
+        assert 'busy_timeout' in out.getvalue() and 'checkpoint' in out.getvalue(), \
+            'Проверьте, что команда `sqlite_status` выводит прагмы и состояние контрольной точки'
+
+        assert get_pragmas({'journal_mode': 'wal', 'mmap_size': ''}) == [('journal_mode', 'wal')], \
+            'Проверьте, что пустое значение прагмы оставляет значение SQLite по умолчанию'
+        settings.SQLITE_PRAGMAS = {'journal_mode': 'wal; DROP TABLE item'}
+        with pytest.raises(ImproperlyConfigured):
+            get_pragmas()